@@ -0,0 +1,13 @@
+"""
+Helpers shared by the benchmarks.
+"""
+import subprocess
+from pathlib import Path
+
+root = Path(__file__).parent.parent.absolute()
+
+
+def git_commit() -> str | None:
+    """The short hash of the checked out commit, saved with every result."""
+    process = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True, text=True)
+    return process.stdout.strip() or None
@@ -0,0 +1,178 @@
+"""
+Synthetic data for the benchmarks: a SQLite database with projects, tasks and entries.
+
+    python -m benchmarks.dataset FILE [--projects 1000] [--tasks 50000] [--entries 5000000] [--days 730] [--seed 1]
+
+The distributions try to look like real use:
+
+* tasks per project and entries per task are skewed (a few big projects and
+  long-running tasks, many small ones);
+* entries start on working days, mostly during office hours, and last around
+  40 minutes (log-normal, from a minute to 10 hours);
+* most tasks are concluded, some are new, in progress or deleted.
+
+The entries go through `importer.insert_entries`, so the daily rollup is filled
+like after an import. The same seed gives the same database.
+"""
+import typing as _
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import datetime, date, timedelta
+from pathlib import Path
+
+import sqlalchemy as sa
+
+import db
+import importer
+import migrations
+import models as m
+
+BATCH_SIZE = importer.BATCH_SIZE
+COMMIT_SIZE = importer.COMMIT_SIZE
+
+WORDS = ('Website', 'Billing', 'Mobile', 'Reports', 'Infra', 'Support', 'Research', 'Onboarding',
+         'Payments', 'Search', 'Design', 'Marketing', 'Data', 'Security', 'Docs', 'Hiring')
+VERBS = ('Fix', 'Review', 'Write', 'Plan', 'Test', 'Deploy', 'Refactor', 'Meet about', 'Document', 'Migrate')
+
+PROJECT_STATES = ((m.State.INPROGRESS, 60), (m.State.CONCLUDED, 30), (m.State.NEW, 5), (m.State.DELETED, 5))
+TASK_STATES = ((m.State.CONCLUDED, 70), (m.State.INPROGRESS, 20), (m.State.NEW, 5), (m.State.DELETED, 5))
+
+
+class Scale(_.NamedTuple):
+    projects: int
+    tasks: int
+    entries: int
+    days: int = 730
+
+    def __str__(self) -> str:
+        return f'{self.projects}p-{self.tasks}t-{self.entries}e-{self.days}d'
+
+
+SCALES = {
+    'small': Scale(10, 200, 20_000),
+    'medium': Scale(100, 5_000, 500_000),
+    'large': Scale(1_000, 50_000, 5_000_000),
+}
+
+
+def _states(rnd: random.Random, weights: _.Sequence[tuple[m.State, int]], count: int) -> list[m.State]:
+    states, shares = zip(*weights)
+    return rnd.choices(states, weights=shares, k=count)
+
+
+def _skewed(rnd: random.Random, count: int, alpha: float) -> list[float]:
+    """Cumulative Pareto weights, for `random.choices`."""
+    total, weights = 0.0, []
+    for _idx in range(count):
+        total += rnd.paretovariate(alpha)
+        weights.append(total)
+    return weights
+
+
+def _entry(rnd: random.Random, first_day: date, days: int) -> tuple[datetime, datetime]:
+    day = first_day + timedelta(days=rnd.randrange(days))
+    while day.weekday() >= 5 and rnd.random() < 0.9:
+        day = first_day + timedelta(days=rnd.randrange(days))
+
+    hour = min(max(rnd.gauss(11.5, 2.5), 6.0), 22.0)
+    start = datetime.combine(day, datetime.min.time()) + timedelta(seconds=round(hour * 3600))
+    minutes = min(max(rnd.lognormvariate(math.log(40), 0.9), 1.0), 600.0)
+    return start, start + timedelta(seconds=round(minutes * 60))
+
+
+def insert_names(connection: sa.Connection, rnd: random.Random, scale: Scale) -> list[int]:
+    """Insert the projects and tasks, returns the task ids."""
+    now = importer.sql_datetime(datetime.now())
+
+    project_states = _states(rnd, PROJECT_STATES, scale.projects)
+    connection.exec_driver_sql(
+        'INSERT INTO project (id, name, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+        [(idx, f'{rnd.choice(WORDS)} {idx:05d}', project_states[idx - 1].name, now, now)
+         for idx in range(1, scale.projects + 1)])
+
+    # Every project gets a task, the others go to the big projects first.
+    project_ids = list(range(1, scale.projects + 1))
+    owners = project_ids + rnd.choices(project_ids, cum_weights=_skewed(rnd, scale.projects, 1.2),
+                                       k=max(scale.tasks - scale.projects, 0))
+    task_states = _states(rnd, TASK_STATES, len(owners))
+    connection.exec_driver_sql(
+        'INSERT INTO task (id, project_id, name, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+        [(idx, project_id, f'{rnd.choice(VERBS)} {rnd.choice(WORDS).lower()} #{idx}', task_states[idx - 1].name,
+          now, now)
+         for idx, project_id in enumerate(owners, start=1)])
+
+    return list(range(1, len(owners) + 1))
+
+
+def generate(path: str | Path, scale: Scale, seed: int = 1,
+             progress: _.Callable[[int], None] = None) -> None:
+    """Create the database at `path` (it must not exist) and fill it."""
+    path = Path(path)
+    if path.exists():
+        raise FileExistsError(f'{path!s} already exists')
+
+    rnd = random.Random(seed)
+    db.init_db(f'sqlite:///{path!s}', policy=db.SessionPolicy.UNIT_OF_WORK, profile=db.FAST)
+    m.create_all()
+    migrations.stamp()
+
+    first_day = date.today() - timedelta(days=scale.days - 1)
+    with db.get_db().engine.connect() as connection:
+        task_ids = insert_names(connection, rnd, scale)
+        weights = _skewed(rnd, len(task_ids), 1.5)
+
+        done = 0
+        while done < scale.entries:
+            count = min(BATCH_SIZE, scale.entries - done)
+            batch = []
+            for task_id in rnd.choices(task_ids, cum_weights=weights, k=count):
+                start, stop = _entry(rnd, first_day, scale.days)
+                batch.append({'task_id': task_id, 'start': start, 'stop': stop, 'manual': rnd.random() < 0.1,
+                              'running': False, **m.day_buckets(start, stop)})
+
+            importer.insert_entries(connection, batch)
+            done += count
+            if done % COMMIT_SIZE < count:
+                connection.commit()
+            if progress is not None:
+                progress(done)
+
+        connection.commit()
+        m.touch_data()
+
+    db.get_db().engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Fill a new SQLite database with synthetic time entries')
+    parser.add_argument('file', type=Path)
+    parser.add_argument('--scale', choices=list(SCALES), help='preset sizes, the other options override them')
+    parser.add_argument('--projects', type=int)
+    parser.add_argument('--tasks', type=int)
+    parser.add_argument('--entries', type=int)
+    parser.add_argument('--days', type=int, help='the entries spread over the last DAYS days')
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    scale = SCALES[args.scale or 'small']._replace(**{
+        name: value for name in Scale._fields if (value := getattr(args, name)) is not None
+    })
+
+    started = time.perf_counter()
+
+    def progress(done: int) -> None:
+        print(f'\r{done:,} / {scale.entries:,} entries, {time.perf_counter() - started:.0f}s',
+              end='', file=sys.stderr, flush=True)
+
+    generate(args.file, scale, args.seed, progress)
+    print(f'\nCreated {args.file} ({scale}) in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Rows of the task grid and of the entries grid built per second.
+
+    python -m benchmarks.rows [--rows 500] [--repeat 5]
+
+Each measure builds `--rows` rows in a withdrawn window, lays them out and waits
+for Tk to process the geometry (`update_idletasks`), then destroys them. The task
+rows are also rebound to other tasks (`set_model`), as when the list scrolls.
+It needs a display. Each run appends a JSON line with the medians to
+`benchmarks/results/rows.jsonl`.
+"""
+import typing as _
+import argparse
+import json
+import statistics
+import sys
+import time
+import tkinter as tk
+from datetime import datetime
+from pathlib import Path
+
+import models as m
+import timers
+from benchmarks.common import git_commit
+from gui import build_root
+from gui.info_form import EntryRow
+from gui.main_form import TaskRow
+from gui.worker import Worker
+
+results_file = Path(__file__).parent / 'results' / 'rows.jsonl'
+
+RowFactory = _.Callable[[tk.Misc], tk.Misc]
+
+
+def snapshots(count: int) -> list[m.TaskSnapshot]:
+    return [m.TaskSnapshot(idx, 1, f'Task {idx}', m.State.INPROGRESS, m.Totals(idx * 60, idx))
+            for idx in range(count)]
+
+
+def build_rate(root: tk.Tk, factory: RowFactory, count: int) -> float:
+    frame = tk.Frame(root)
+    frame.grid(row=0, column=0)
+
+    started = time.perf_counter()
+    for idx in range(count):
+        factory(frame).grid(row=idx, column=0, sticky=tk.EW)
+    frame.update_idletasks()
+    seconds = time.perf_counter() - started
+
+    frame.destroy()
+    return count / seconds
+
+
+def rebind_rate(root: tk.Tk, registry: timers.TimerRegistry, worker: Worker, count: int) -> float:
+    frame = tk.Frame(root)
+    rows = [TaskRow(frame, model=None, timers=registry, worker=worker) for _idx in range(20)]
+    models = snapshots(count)
+
+    started = time.perf_counter()
+    for idx, model in enumerate(models):
+        rows[idx % len(rows)].set_model(model)
+    frame.update_idletasks()
+    seconds = time.perf_counter() - started
+
+    frame.destroy()
+    return count / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure how many grid rows are built per second')
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--results', type=Path, default=results_file)
+    args = parser.parse_args()
+
+    try:
+        root = build_root()
+    except tk.TclError as ex:
+        sys.exit(f'No display: {ex}')
+    root.withdraw()
+
+    registry = timers.TimerRegistry()
+    worker = Worker(root)
+    models = snapshots(args.rows)
+    measures = {
+        'task_rows_per_s': lambda: build_rate(
+            root, lambda frame, it=iter(models): TaskRow(frame, model=next(it), timers=registry, worker=worker),
+            args.rows),
+        'entry_rows_per_s': lambda: build_rate(
+            root, lambda frame: EntryRow(frame, model=None, listener=None, worker=worker), args.rows),
+        'task_rebinds_per_s': lambda: rebind_rate(root, registry, worker, args.rows),
+    }
+
+    result = {'time': datetime.now().isoformat(timespec='seconds'), 'commit': git_commit(),
+              'rows': args.rows, 'repeat': args.repeat}
+    for name, measure in measures.items():
+        measure()  # Warm-up, the styles are configured there
+        result[name] = statistics.median(measure() for _idx in range(args.repeat))
+        print(f'{name}: {result[name]:,.0f}')
+
+    worker.shutdown()
+    root.destroy()
+
+    args.results.parent.mkdir(parents=True, exist_ok=True)
+    with args.results.open('a', encoding='utf-8') as file:
+        file.write(json.dumps(result) + '\n')
+    print(f'Saved to {args.results}')
+
+
+if __name__ == '__main__':
+    main()
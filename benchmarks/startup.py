@@ -0,0 +1,110 @@
+"""
+Startup time of the GUI, to track over time.
+
+    python -m benchmarks.startup [--runs 10] [--top 15] [--results benchmarks/results/startup.jsonl]
+
+Two measures:
+
+* `python -X importtime` on the modules main.py loads: self and cumulative
+  microseconds of each import, the top ones are printed.
+* Wall-clock time from spawning `main.py --startup-probe` to its first (empty)
+  window and to the loaded main form, the median of `--runs` runs. This needs a
+  display, without one only the import times are measured.
+
+Each run appends a JSON line (time, git commit, medians and top imports) to the
+results file, so a change can be compared with the previous runs.
+"""
+import typing as _
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.common import root, git_commit
+
+results_file = Path(__file__).parent / 'results' / 'startup.jsonl'
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+# What the GUI imports before its first window, then after it.
+FIRST_WINDOW_IMPORTS = 'import main, gui, tkinter'
+MAIN_FORM_IMPORTS = 'import main, db, models, migrations, gui.main_form'
+
+
+class Import(_.NamedTuple):
+    module: str
+    level: int
+    self_us: int
+    cumulative_us: int
+
+
+def import_times(statement: str) -> list[Import]:
+    """The imports of `statement` in a fresh interpreter, from `-X importtime`."""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                             cwd=root, capture_output=True, text=True, check=True)
+    imports = []
+    for line in process.stderr.splitlines():
+        if match := IMPORT_LINE.match(line):
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append(Import(module, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def probe(db_file: Path) -> dict[str, float]:
+    """Seconds from the spawn of main.py to each of its startup milestones."""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'main.py', '--startup-probe', '--db', str(db_file)], cwd=root,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    events = {}
+    for line in process.stdout:
+        if line.startswith('startup-probe '):
+            events[line.split()[1]] = time.perf_counter() - started
+
+    if process.wait() != 0:
+        raise RuntimeError(process.stderr.read().strip().splitlines()[-1])
+    return events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the startup time of the GUI')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to print and save')
+    parser.add_argument('--results', type=Path, default=results_file)
+    args = parser.parse_args()
+
+    result = {'time': datetime.now().isoformat(timespec='seconds'), 'commit': git_commit(), 'runs': args.runs}
+
+    for name, statement in (('first_window', FIRST_WINDOW_IMPORTS), ('main_form', MAIN_FORM_IMPORTS)):
+        runs = [import_times(statement) for _run in range(args.runs)]
+        totals = [sum(item.cumulative_us for item in imports if item.level == 0) for imports in runs]
+        milliseconds = result[f'imports_{name}_ms'] = statistics.median(totals) / 1000
+        print(f'imports up to {name}: {milliseconds:.1f} ms')
+
+    slowest = sorted(runs[-1], key=lambda item: item.self_us, reverse=True)[:args.top]
+    result['slowest_imports_us'] = {item.module: item.self_us for item in slowest}
+    for item in slowest:
+        print(f'  {item.self_us / 1000:8.2f} ms  {item.module}')
+
+    db_file = args.results.parent / 'startup.sqlite'
+    args.results.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        probe(db_file)  # Creates the database, not measured
+        runs = [probe(db_file) for _run in range(args.runs)]
+    except RuntimeError as ex:
+        print(f'wall-clock skipped, the GUI did not start: {ex}')
+    else:
+        for event in runs[0]:
+            seconds = result[event.replace('-', '_') + '_s'] = statistics.median(run[event] for run in runs)
+            print(f'{event}: {seconds * 1000:.0f} ms')
+
+    with args.results.open('a', encoding='utf-8') as file:
+        file.write(json.dumps(result) + '\n')
+    print(f'Saved to {args.results}')
+
+
+if __name__ == '__main__':
+    main()
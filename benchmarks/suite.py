@@ -0,0 +1,169 @@
+"""
+Benchmarks of the models layer, at several data scales.
+
+    python -m benchmarks.suite [--scale small --scale medium] [--repeat 20] [--session-policy unit-of-work]
+
+The databases are generated once per scale and seed (see `benchmarks.dataset`)
+and kept in `benchmarks/results/`. Every benchmark runs `--repeat` times after a
+warm-up, each run in its own session, and reports the median, p95 and minimum.
+
+Each run appends a JSON line per scale (time, git commit, scale, timings) to
+`benchmarks/results/models.jsonl`, and is printed next to the previous run of
+the same scale, so a change can be compared with what was there before.
+"""
+import typing as _
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import sqlalchemy as sa
+
+import db
+import models as m
+from benchmarks.common import git_commit
+from benchmarks.dataset import SCALES, Scale, generate
+
+results_dir = Path(__file__).parent / 'results'
+results_file = results_dir / 'models.jsonl'
+
+SAMPLES = 100  # Names looked up by the `find_name`/`find_id` benchmarks
+
+Bench = _.Callable[[], _.Any]
+
+
+class Timing(_.NamedTuple):
+    median_ms: float
+    p95_ms: float
+    min_ms: float
+
+    @classmethod
+    def of(cls, seconds: list[float]) -> 'Timing':
+        seconds = sorted(seconds)
+        p95 = seconds[min(round(len(seconds) * 0.95), len(seconds) - 1)]
+        return cls(statistics.median(seconds) * 1000, p95 * 1000, seconds[0] * 1000)
+
+
+def measure(bench: Bench, repeat: int) -> Timing:
+    def run() -> float:
+        started = time.perf_counter()
+        with db.get_db().session():
+            bench()
+        return time.perf_counter() - started
+
+    run()
+    return Timing.of([run() for _idx in range(repeat)])
+
+
+def benchmarks(rnd: random.Random) -> dict[str, Bench]:
+    """The benchmarks, with their samples picked from the current database."""
+    with db.get_db().session() as session:
+        projects = session.execute(sa.select(m.Project.id, m.Project.name)
+                                   .where(m.Project.state != m.State.DELETED)).all()
+        tasks = session.execute(sa.select(m.Task.id, m.Task.project_id, m.Task.name)
+                                .where(m.Task.state != m.State.DELETED)).all()
+        # The project with the most tasks, the worst case of the grid.
+        biggest = session.scalar(sa.select(m.Task.project_id)
+                                 .where(m.Task.state != m.State.DELETED)
+                                 .group_by(m.Task.project_id)
+                                 .order_by(sa.func.count().desc())
+                                 .limit(1))
+
+    project_names = [name for _id, name in rnd.sample(projects, min(SAMPLES, len(projects)))]
+    task_names = [(project_id, name) for _id, project_id, name in rnd.sample(tasks, min(SAMPLES, len(tasks)))]
+    project_ids = [project_id for project_id, _name in projects]
+    task_ids = [task_id for task_id, _project_id, _name in tasks]
+    week = datetime.combine(datetime.today(), datetime.min.time()) - timedelta(days=7)
+
+    def get(cls: type[m.Base], ids: list[int]) -> m.Base:
+        return db.get_db().cur_session.get(cls, rnd.choice(ids))
+
+    # Grid loads, as the main form does it (from its worker thread).
+    from gui.main_form import MainForm
+
+    return {
+        'project.find_all': lambda: list(m.Project.find_all()),
+        'project.find_name': lambda: m.Project.find_name(rnd.choice(project_names)),
+        'task.find_name': lambda: m.Task.find_name(*rnd.choice(task_names)),
+        'project.find_id': lambda: m.Project.find_id(rnd.choice(project_names)),
+        'task.find_id': lambda: m.Task.find_id(*rnd.choice(task_names)),
+        'project.elapsed_seconds': lambda: get(m.Project, project_ids).elapsed_seconds,
+        'project.today_seconds': lambda: get(m.Project, project_ids).today_seconds,
+        'task.elapsed_seconds': lambda: get(m.Task, task_ids).elapsed_seconds,
+        'task.today_seconds': lambda: get(m.Task, task_ids).today_seconds,
+        'project.totals': lambda: m.Project.totals(),
+        'project.totals(last week)': lambda: m.Project.totals(start=week),
+        'grid.project_names': MainForm.load_project_names,
+        'grid.tasks(biggest project)': lambda: MainForm.load_tasks(biggest),
+        'grid.tasks(random project)': lambda: MainForm.load_tasks(rnd.choice(project_ids)),
+    }
+
+
+def dataset(scale: Scale, seed: int) -> Path:
+    path = results_dir / f'dataset-{scale}-s{seed}.sqlite'
+    if not path.exists():
+        print(f'Generating {path.name}', file=sys.stderr)
+        results_dir.mkdir(parents=True, exist_ok=True)
+        generate(path, scale, seed)
+    return path
+
+
+def previous_run(path: Path, scale: Scale) -> dict[str, _.Any] | None:
+    previous = None
+    if path.exists():
+        with path.open(encoding='utf-8') as file:
+            for line in file:
+                if (result := json.loads(line))['scale'] == str(scale):
+                    previous = result
+    return previous
+
+
+def run_scale(name: str, scale: Scale, args: argparse.Namespace) -> dict[str, _.Any]:
+    path = dataset(scale, args.seed)
+    db.init_db(f'sqlite:///{path!s}', policy=db.SessionPolicy(args.session_policy), profile=db.PROFILES[args.profile])
+
+    result = {'time': datetime.now().isoformat(timespec='seconds'), 'commit': git_commit(), 'scale': str(scale),
+              'session_policy': args.session_policy, 'profile': args.profile, 'repeat': args.repeat, 'timings': {}}
+    previous = previous_run(args.results, scale)
+
+    print(f'\n{name} ({scale})')
+    print(f'{"":30}{"median":>10}{"p95":>10}{"min":>10}{"before":>10}')
+    for bench_name, bench in benchmarks(random.Random(args.seed)).items():
+        timing = measure(bench, args.repeat)
+        result['timings'][bench_name] = timing._asdict()
+
+        before = ''
+        if previous and (old := previous['timings'].get(bench_name)):
+            before = f'{old["median_ms"]:.2f}'
+        print(f'{bench_name:30}{timing.median_ms:10.2f}{timing.p95_ms:10.2f}{timing.min_ms:10.2f}{before:>10}')
+
+    db.get_db().engine.dispose()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the models layer')
+    parser.add_argument('--scale', action='append', choices=list(SCALES),
+                        help='repeatable (default: small and medium)')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--session-policy', choices=('unit-of-work', 'long-lived'), default='unit-of-work')
+    parser.add_argument('--profile', choices=('fast', 'durable'), default='durable')
+    parser.add_argument('--results', type=Path, default=results_file)
+    args = parser.parse_args()
+
+    results = [run_scale(name, SCALES[name], args) for name in args.scale or ('small', 'medium')]
+
+    args.results.parent.mkdir(parents=True, exist_ok=True)
+    with args.results.open('a', encoding='utf-8') as file:
+        for result in results:
+            file.write(json.dumps(result) + '\n')
+    print(f'\nSaved to {args.results}')
+
+
+if __name__ == '__main__':
+    main()
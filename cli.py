@@ -0,0 +1,290 @@
+"""
+Command line for the timers and the totals, without the GUI (tkinter is never imported).
+
+    python cli.py status [-q]
+    python cli.py start PROJECT TASK [--create]
+    python cli.py stop [PROJECT TASK]
+    python cli.py add PROJECT TASK START STOP [--date DATE] [--stop-date DATE] [--create]
+    python cli.py totals [PROJECT] [--from DATE] [--to DATE]
+    python cli.py report [--rows project|date] [--granularity day|week|month] [--from DATE] [--to DATE]
+
+The dates and times take the formats of the GUI (see `utils.dateformat`/`utils.timeformat`).
+
+`status` is meant for shell prompt hooks: it reads the running entries with the
+`sqlite3` module only. The other commands load SQLAlchemy and the models when they
+run, they share the timers of the GUI (see `timers.py`).
+"""
+import typing as _
+import argparse
+import sqlite3
+import sys
+from datetime import datetime, date, timedelta
+from pathlib import Path
+
+import utils
+
+root = Path(__file__).parent.expanduser().absolute()
+db_file = root / 'data.sqlite'
+
+# Matches the partial index `ix_task_entry_running`.
+STATUS_SQL = '''\
+SELECT project.name, task.name, task_entry.start
+FROM task_entry
+JOIN task ON task.id = task_entry.task_id
+JOIN project ON project.id = task.project_id
+WHERE task_entry.running IS 1
+ORDER BY task_entry.start'''
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Time tracker timers and totals, from the command line')
+    parser.add_argument('--db', type=Path, default=db_file, help='database file (default: %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    status = commands.add_parser('status', help='show the running timers')
+    status.add_argument('-q', '--quiet', action='store_true', help='print nothing when no timer is running')
+    status.set_defaults(func=cmd_status)
+
+    start = commands.add_parser('start', help='start the timer of a task')
+    start.add_argument('project')
+    start.add_argument('task')
+    start.add_argument('--create', action='store_true', help='create the project and the task if missing')
+    start.set_defaults(func=cmd_start)
+
+    stop = commands.add_parser('stop', help='stop the running timers, or the one of a task')
+    stop.add_argument('project', nargs='?')
+    stop.add_argument('task', nargs='?')
+    stop.set_defaults(func=cmd_stop)
+
+    add = commands.add_parser('add', help='add an entry')
+    add.add_argument('project')
+    add.add_argument('task')
+    add.add_argument('start', help='start time')
+    add.add_argument('stop', help='stop time')
+    add.add_argument('--date', help='day of the start (default: today)')
+    add.add_argument('--stop-date', help='day of the stop (default: the start day, or the next one)')
+    add.add_argument('--create', action='store_true', help='create the project and the task if missing')
+    add.set_defaults(func=cmd_add)
+
+    totals = commands.add_parser('totals', help='time per project, or per task of a project')
+    totals.add_argument('project', nargs='?')
+    totals.add_argument('--from', dest='date_from', type=utils.parse_date, metavar='DATE')
+    totals.add_argument('--to', dest='date_to', type=utils.parse_date, metavar='DATE', help='included')
+    totals.set_defaults(func=cmd_totals)
+
+    report = commands.add_parser('report', help='time per project and date (default: this month, by day)')
+    report.add_argument('--rows', choices=('project', 'date'), default='project')
+    report.add_argument('--granularity', choices=('day', 'week', 'month'), default='day')
+    report.add_argument('--from', dest='date_from', type=utils.parse_date, metavar='DATE')
+    report.add_argument('--to', dest='date_to', type=utils.parse_date, metavar='DATE', help='included')
+    report.set_defaults(func=cmd_report)
+
+    return parser.parse_args(argv)
+
+
+# region Helpers
+def open_db(path: Path) -> None:
+    """Load the models and connect, creating or migrating the database like the GUI does."""
+    import db
+    import migrations
+    import models
+
+    create_all = not path.exists()
+    db.init_db(f'sqlite:///{path!s}', policy=db.SessionPolicy.UNIT_OF_WORK, profile=db.DURABLE)
+
+    if create_all:
+        models.create_all()
+        migrations.stamp()
+    else:
+        migrations.migrate()
+
+
+def find_task(project_name: str, task_name: str, create: bool = False) -> int | None:
+    """The task id. Call inside a session."""
+    import models as m
+    from db import get_db
+
+    session = get_db().cur_session
+    if (project_id := m.Project.find_id(project_name)) is None and create:
+        project = m.Project(name=project_name)
+        session.add(project)
+        session.flush()
+        project_id = project.id
+
+    if project_id is None:
+        print(f'Project {project_name!r} not found', file=sys.stderr)
+        return None
+
+    if (task_id := m.Task.find_id(project_id, task_name)) is None and create:
+        task = m.Task(project_id=project_id, name=task_name)
+        session.add(task)
+        session.flush()
+        task_id = task.id
+
+    if task_id is None:
+        print(f'Task {task_name!r} not found in {project_name!r}', file=sys.stderr)
+    return task_id
+
+
+def day_range(args: argparse.Namespace) -> tuple[datetime | None, datetime | None]:
+    start = args.date_from and datetime.combine(args.date_from, datetime.min.time())
+    stop = args.date_to and datetime.combine(args.date_to + timedelta(days=1), datetime.min.time())
+    return start, stop
+
+
+def print_table(header: _.Sequence[str], rows: _.Iterable[_.Sequence[str]]) -> None:
+    rows = [header, *rows]
+    widths = [max(len(row[idx]) for row in rows) for idx in range(len(header))]
+    for row in rows:
+        print('  '.join(value.ljust(width) if idx == 0 else value.rjust(width)
+                        for idx, (value, width) in enumerate(zip(row, widths))).rstrip())
+# endregion
+
+
+# region Commands
+def cmd_status(args: argparse.Namespace) -> int:
+    running = []
+    if args.db.exists():
+        try:
+            with sqlite3.connect(f'file:{args.db}?mode=ro', uri=True) as connection:
+                running = connection.execute(STATUS_SQL).fetchall()
+        except sqlite3.OperationalError:
+            # Not migrated yet, the slow path once.
+            open_db(args.db)
+            with sqlite3.connect(f'file:{args.db}?mode=ro', uri=True) as connection:
+                running = connection.execute(STATUS_SQL).fetchall()
+
+    now = datetime.now()
+    for project, task, start in running:
+        elapsed = (now - datetime.fromisoformat(start)).total_seconds()
+        print(f'{project} / {task} {utils.format_seconds(max(elapsed, 0))}')
+
+    if not running and not args.quiet:
+        print('No timer running')
+    return 0
+
+
+def cmd_start(args: argparse.Namespace) -> int:
+    open_db(args.db)
+    import models as m
+    import timers
+    from db import get_db
+
+    with get_db().session() as session:
+        if (task_id := find_task(args.project, args.task, args.create)) is None:
+            return 1
+
+        if m.TaskEntry.find_running(task_ids=[task_id]):
+            print(f'{args.project} / {args.task} is already running', file=sys.stderr)
+            return 1
+
+        task = m.Task.find(task_id)
+        task.state = m.State.INPROGRESS
+        session.add(task)
+        timers.RunningTimer(task_id, m.Totals()).open_entry()
+
+    print(f'Started {args.project} / {args.task}')
+    return 0
+
+
+def cmd_stop(args: argparse.Namespace) -> int:
+    if (args.project is None) != (args.task is None):
+        print('Give both the project and the task, or none to stop all the timers', file=sys.stderr)
+        return 2
+
+    open_db(args.db)
+    import models as m
+    from db import get_db
+
+    now = datetime.now()
+    with get_db().session() as session:
+        task_ids = None
+        if args.project is not None:
+            if (task_id := find_task(args.project, args.task)) is None:
+                return 1
+            task_ids = [task_id]
+
+        for entry in m.TaskEntry.find_running(task_ids=task_ids):
+            entry.stop = max(now, entry.start)
+            entry.running = False
+            session.add(entry)
+            print(f'Stopped {entry.task.project.name} / {entry.task.name} {entry.elapsed_time}')
+
+    return 0
+
+
+def cmd_add(args: argparse.Namespace) -> int:
+    open_db(args.db)
+    import models as m
+    from db import get_db
+    from importer import parse_range
+
+    try:
+        start, stop = parse_range({
+            'start_date': args.date or date.today().strftime('%d-%m-%Y'),
+            'start_time': args.start,
+            'stop_date': args.stop_date,
+            'stop_time': args.stop,
+        })
+    except ValueError as ex:
+        print(ex, file=sys.stderr)
+        return 2
+
+    with get_db().session() as session:
+        if (task_id := find_task(args.project, args.task, args.create)) is None:
+            return 1
+        session.add(m.TaskEntry(task_id=task_id, manual=True, start=start, stop=stop))
+
+    print(f'Added {args.project} / {args.task} {start} - {stop}')
+    return 0
+
+
+def cmd_totals(args: argparse.Namespace) -> int:
+    """The running timers count up to their last checkpoint."""
+    open_db(args.db)
+    import models as m
+    from db import get_db
+
+    start, stop = day_range(args)
+    with get_db().session():
+        if args.project is None:
+            names = {project.id: project.name for project in m.Project.find_all()}
+            totals = m.Project.totals(names, start, stop)
+        else:
+            if (project_id := m.Project.find_id(args.project)) is None:
+                print(f'Project {args.project!r} not found', file=sys.stderr)
+                return 1
+            names = {task.id: task.name for task in m.Task.snapshots(project_id=project_id)}
+            totals = m.Task.totals(project_id, names, start, stop)
+
+    rows = [(name, utils.format_seconds(totals.get(key, m.Totals()).elapsed_seconds),
+             utils.format_seconds(totals.get(key, m.Totals()).today_seconds))
+            for key, name in names.items()]
+    print_table(('Task' if args.project else 'Project', 'Total', 'Today'), rows)
+    return 0
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    open_db(args.db)
+    import reports
+
+    today = date.today()
+    start = args.date_from or today.replace(day=1)
+    stop = (args.date_to or today) + timedelta(days=1)
+    kind = reports.Kind.PROJECT_BY_DATE if args.rows == 'project' else reports.Kind.DATE_BY_PROJECT
+
+    report = reports.build(kind, start, stop, reports.Granularity(args.granularity))
+    rows = [(row.label, *map(utils.format_seconds, row.values), utils.format_seconds(row.total))
+            for row in report.rows]
+    print_table(('', *report.columns, 'Total'), rows)
+    return 0
+# endregion
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,31 +1,186 @@
 import typing as _
-from contextlib import contextmanager
-from sqlalchemy import create_engine
+import enum
+import sys
+import threading
+import weakref
+from contextlib import contextmanager, nullcontext
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.pool import QueuePool, StaticPool
 from sqlalchemy.orm import Session
 
 if _.TYPE_CHECKING:
     from sqlalchemy import Engine
+    from sql_profiler import SqlProfiler
+
+
+class SessionPolicy(enum.Enum):
+    UNIT_OF_WORK = 'unit-of-work'  # A new session for each outermost `session()` block
+    LONG_LIVED = 'long-lived'  # One session per thread, evicted when it holds more than `max_identities`
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class EngineProfile(_.NamedTuple):
+    """SQLite settings, set with PRAGMA on every new connection."""
+    name: str
+    journal_mode: str = 'WAL'
+    synchronous: str = 'NORMAL'
+    cache_size: int = -2_000  # Negative is KiB, positive is pages
+    mmap_size: int = 0  # Bytes
+    temp_store: str = 'DEFAULT'
+    busy_timeout: int = 5_000  # Milliseconds
+    pool_size: int = 5  # Connections kept open: the GUI thread and the workers
+
+    def pragmas(self) -> dict[str, _.Any]:
+        return {
+            'journal_mode': self.journal_mode,
+            'synchronous': self.synchronous,
+            'cache_size': self.cache_size,
+            'mmap_size': self.mmap_size,
+            'temp_store': self.temp_store,
+            'busy_timeout': self.busy_timeout,
+        }
+
+
+# WAL with synchronous=NORMAL never corrupts the database, but a power loss can undo the last commits.
+FAST = EngineProfile('fast', synchronous='NORMAL', cache_size=-64_000, mmap_size=256 * 2 ** 20,
+                     temp_store='MEMORY')
+# synchronous=FULL syncs the WAL on every commit, nothing that was committed is lost.
+DURABLE = EngineProfile('durable', synchronous='FULL', cache_size=-16_000, mmap_size=0, temp_store='MEMORY')
+
+PROFILES = {profile.name: profile for profile in (FAST, DURABLE)}
+
+
+def apply_profile(engine: 'Engine', profile: EngineProfile) -> None:
+    """Set the profile on the connections opened from now on."""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in profile.pragmas().items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+
+def engine_options(url: str, profile: EngineProfile) -> dict[str, _.Any]:
+    """
+    The pool for SQLite: the connections of a file are kept in a queue and reused by any
+    thread, an in-memory database only exists in its one connection.
+    """
+    url = make_url(url)
+    if url.database in (None, '', ':memory:'):
+        return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+
+    return {'poolclass': QueuePool, 'pool_size': profile.pool_size, 'max_overflow': profile.pool_size,
+            'connect_args': {'check_same_thread': False}}
 
 
 class Database:
-    def __init__(self, url: str, **kwargs):
+    """
+    The engine and the sessions, never shared between threads.
+
+    The GUI thread and the background workers (see `gui.worker`) never share a session,
+    objects loaded by one thread must be expunged before they are handed to another.
+
+    How long a session lives depends on `policy`. The short-lived sessions do not expire
+    on commit, so what was read in a block can still be read (not lazy loaded) once
+    their session is closed.
+    """
+
+    def __init__(self, url: str, policy: SessionPolicy = SessionPolicy.LONG_LIVED,
+                 max_identities: int = 10_000, profile: EngineProfile = None, **kwargs):
+        if profile is not None:
+            kwargs = {**engine_options(url, profile), **kwargs}
+
         self.engine: 'Engine' = create_engine(url, **kwargs)
-        self._cur_session: Session | None = None
+        self.profile = profile
+        if profile is not None:
+            apply_profile(self.engine, profile)
+
+        self.policy = policy
+        self.max_identities = max_identities
+        self.profiler: 'SqlProfiler | None' = None
+
+        self._local = threading.local()
+        self._sessions: weakref.WeakSet[Session] = weakref.WeakSet()
+        self._lock = threading.Lock()
 
     @property
-    def cur_session(self):
-        return self._cur_session
+    def cur_session(self) -> Session | None:
+        return getattr(self._local, 'session', None)
+
+    def new_session(self) -> Session:
+        session = Session(self.engine, autobegin=False,
+                          expire_on_commit=self.policy == SessionPolicy.LONG_LIVED)
+        with self._lock:
+            self._sessions.add(session)
+        return session
 
     @contextmanager
     def session(self) -> Session:
-        if self._cur_session is None:
-            self._cur_session = Session(self.engine, autobegin=False)
-
-        if self._cur_session.in_transaction():
-            yield self._cur_session
-        else:
-            with self._cur_session.begin():
-                yield self._cur_session
+        session = self.cur_session
+        if session is not None and session.in_transaction():
+            yield session
+            return
+
+        unit_of_work = session is None and self.policy != SessionPolicy.LONG_LIVED
+        if session is None:
+            self._local.session = session = self.new_session()
+
+        try:
+            with self.profiled(self.profiler and _caller_name()), session.begin():
+                yield session
+        finally:
+            if unit_of_work:
+                self._local.session = None
+                session.close()
+            elif len(session.identity_map) > session.info.get('evict_above', self.max_identities):
+                self.evict(session)
+                # The objects still referenced stay: wait until the map grows again, otherwise
+                # every block would expire them and each attribute access would reload them.
+                session.info['evict_above'] = max(self.max_identities,
+                                                  len(session.identity_map) + self.max_identities // 10)
+
+    # region Profiler
+    def enable_profiler(self, **kwargs) -> 'SqlProfiler':
+        """Count the statements of each action, see `sql_profiler`."""
+        from sql_profiler import SqlProfiler
+
+        if self.profiler is None:
+            self.profiler = SqlProfiler(self.engine, **kwargs)
+            self.profiler.install()
+        return self.profiler
+
+    def profiled(self, name: str) -> _.ContextManager:
+        """The statements of the block are one action of the profiler, when enabled."""
+        return nullcontext() if self.profiler is None else self.profiler.action(name)
+    # endregion
+
+    # region Identity map
+    @staticmethod
+    def evict(session: Session) -> None:
+        """
+        Expire every object, which also drops their loaded relationships.
+
+        The identity map only holds weak references, so the objects nobody else
+        references go away; the others are loaded again on their next use.
+        """
+        session.expire_all()
+
+    def identity_count(self) -> int:
+        """Objects in the identity maps of the open sessions, of all the threads."""
+        with self._lock:
+            sessions = list(self._sessions)
+        return sum(len(session.identity_map) for session in sessions)
+    # endregion
+
+
+def _caller_name() -> str:
+    """The function that opened a `Database.session()`."""
+    frame = sys._getframe(3)  # _caller_name, session(), contextmanager.__enter__
+    return f'{frame.f_globals.get("__name__")}.{frame.f_code.co_qualname}'
 
 
 _db: Database | None = None
@@ -0,0 +1,204 @@
+"""
+Streaming export of the entries, with the names of their task and project.
+
+The entries are read in chunks of `FETCH_SIZE` rows (`yield_per`) and written as
+they come, the whole result is never in memory. They can be filtered by project
+names, task states (all but deleted by default) and a date range: the entries
+overlapping it are exported whole, not clipped.
+
+The entries come by the day they start, then as they were added (`day`, `id`):
+`ix_task_entry_day` gives that order, so SQLite does not sort the whole export.
+Within a day they are not sorted by their start time.
+
+Two formats:
+
+* CSV: project, task, state, start, stop, seconds, manual.
+* Columnar: the columns one after the other in a single file, so they can be
+  memory-mapped (see `read_columnar`)::
+
+      header     MAGIC, rows, dictionary offset, dictionary size (<8sQQQ)
+      start      int64[rows]  seconds since 1970-01-01 of the (naive, local) start
+      stop       int64[rows]
+      project    int32[rows]  index in dictionary['projects']
+      task       int32[rows]  index in dictionary['tasks']
+      state      int32[rows]  index in dictionary['states']
+      dictionary JSON, utf-8
+"""
+import typing as _
+import csv
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+import sqlalchemy as sa
+
+import models as m
+from db import get_db
+
+FETCH_SIZE = 10_000
+MAGIC = b'TTCOLS1\n'
+HEADER = struct.Struct('<8sQQQ')
+COLUMNS = (('start', 'q'), ('stop', 'q'), ('project', 'i'), ('task', 'i'), ('state', 'i'))
+CSV_FIELDS = ('project', 'task', 'state', 'start', 'stop', 'seconds', 'manual')
+
+Row = tuple[_.Any, ...]
+
+
+class Columnar(_.NamedTuple):
+    """The columns of an exported file, as views on its memory map."""
+    rows: int
+    start: memoryview
+    stop: memoryview
+    project: memoryview
+    task: memoryview
+    state: memoryview
+    projects: list[str]
+    tasks: list[str]
+    states: list[str]
+
+
+def select_entries(*columns: _.Any, projects: _.Iterable[str] = None, states: _.Iterable[m.State] = None,
+                   start: datetime = None, stop: datetime = None, max_days: int = 0) -> sa.Select:
+    cmd = (sa.select(*columns)
+           .select_from(m.TaskEntry)
+           .join(m.Task, m.Task.id == m.TaskEntry.task_id)
+           .join(m.Project, m.Project.id == m.Task.project_id)
+           .where(m.Project.state != m.State.DELETED,
+                  *m.overlapping(start, stop, max_days))
+           .order_by(m.TaskEntry.day, m.TaskEntry.id))
+
+    if projects is not None:
+        cmd = cmd.where(m.Project.name.in_(list(projects)))
+    if states is not None:
+        cmd = cmd.where(m.Task.state.in_(list(states)))
+    else:
+        cmd = cmd.where(m.Task.state != m.State.DELETED)
+
+    return cmd
+
+
+def stream(columns: _.Sequence[_.Any], **filters: _.Any) -> _.Generator[Row, None, None]:
+    with get_db().engine.connect() as connection:
+        max_days = connection.scalar(m.max_entry_days())
+        cmd = select_entries(*columns, max_days=max_days, **filters)
+        yield from connection.execution_options(yield_per=FETCH_SIZE).execute(cmd)
+
+
+def _text(value: sa.ColumnElement) -> sa.ColumnElement:
+    """A date-time as stored, skipping the parsing of the `DateTime` type."""
+    return sa.func.strftime('%Y-%m-%d %H:%M:%S', value)
+
+
+def _epoch(value: sa.ColumnElement) -> sa.ColumnElement:
+    return sa.cast(sa.func.strftime('%s', value), sa.Integer)
+
+
+def export_csv(path: str | Path, **filters: _.Any) -> int:
+    """Write the entries to a CSV file, returns how many."""
+    columns = (m.Project.name, m.Task.name, sa.cast(m.Task.state, sa.String),
+               _text(m.TaskEntry.start), _text(m.TaskEntry.stop),
+               sa.func.round((sa.func.julianday(m.TaskEntry.stop) - sa.func.julianday(m.TaskEntry.start)) * 86400),
+               m.TaskEntry.manual)
+
+    count = 0
+    with Path(path).open('w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_FIELDS)
+        for project, task, state, start, stop, seconds, manual in stream(columns, **filters):
+            writer.writerow((project, task, m.State[state].value, start, stop, int(seconds), int(manual)))
+            count += 1
+
+    return count
+
+
+class _Dictionary:
+    """Codes of the names, in order of first appearance."""
+
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+
+    def __getitem__(self, name: str) -> int:
+        if (code := self.codes.get(name)) is None:
+            self.codes[name] = code = len(self.codes)
+        return code
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.codes)
+
+
+def export_columnar(path: str | Path, **filters: _.Any) -> int:
+    """
+    Write the entries to a columnar file, returns how many.
+
+    Each column is first appended to its own temporary file, chunk by chunk, then
+    they are copied one after the other into `path`.
+    """
+    path = Path(path)
+    columns = (_epoch(m.TaskEntry.start), _epoch(m.TaskEntry.stop), m.Project.name, m.Task.name,
+               sa.cast(m.Task.state, sa.String))
+    dictionaries = {'projects': _Dictionary(), 'tasks': _Dictionary(), 'states': _Dictionary()}
+    projects, tasks, states = dictionaries.values()
+
+    count = 0
+    with tempfile.TemporaryDirectory(dir=path.parent) as tmp:
+        files = {name: open(Path(tmp, name), 'wb') for name, _code in COLUMNS}
+        try:
+            chunk = {name: array(code) for name, code in COLUMNS}
+            for start, stop, project, task, state in stream(columns, **filters):
+                chunk['start'].append(start)
+                chunk['stop'].append(stop)
+                chunk['project'].append(projects[project])
+                chunk['task'].append(tasks[task])
+                chunk['state'].append(states[m.State[state].value])
+                count += 1
+
+                if count % FETCH_SIZE == 0:
+                    _flush(chunk, files)
+            _flush(chunk, files)
+        finally:
+            for file in files.values():
+                file.close()
+
+        dictionary = json.dumps({name: values.names for name, values in dictionaries.items()}).encode()
+        data_size = sum(array(code).itemsize for _name, code in COLUMNS) * count
+
+        with path.open('wb') as file:
+            file.write(HEADER.pack(MAGIC, count, HEADER.size + data_size, len(dictionary)))
+            for name, _code in COLUMNS:
+                with open(Path(tmp, name), 'rb') as column:
+                    shutil.copyfileobj(column, file)
+            file.write(dictionary)
+
+    return count
+
+
+def _flush(chunk: dict[str, array], files: dict[str, _.BinaryIO]) -> None:
+    for name, values in chunk.items():
+        values.tofile(files[name])
+        del values[:]
+
+
+def read_columnar(path: str | Path) -> Columnar:
+    """Memory-map a columnar file. The views stay valid as long as the returned value is referenced."""
+    with open(path, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, rows, dictionary_offset, dictionary_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f'{path!s} is not an exported columnar file')
+
+    view = memoryview(data)
+    offset, columns = HEADER.size, {}
+    for name, code in COLUMNS:
+        size = array(code).itemsize * rows
+        columns[name] = view[offset:offset + size].cast(code)
+        offset += size
+
+    dictionary = json.loads(bytes(view[dictionary_offset:dictionary_offset + dictionary_size]))
+    return Columnar(rows, **columns, **dictionary)
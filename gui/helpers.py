@@ -1,7 +1,10 @@
 import typing as _
+import tkinter as tk
 from tkinter import messagebox
 from functools import wraps
 
+import metrics
+
 RecordId = _.NewType('RecordId', int)
 Message = _.NewType('Message', str)
 IsOk = _.NewType('IsOk', bool)
@@ -31,12 +34,20 @@ class ServiceResult:
                 messagebox.showerror(message=self.message)
 
 
+def grid_row(parent: tk.Misc, widgets: _.Sequence[tk.Misc], row: int = 0, column: int = 0, **options) -> None:
+    """Grid the widgets side by side, from `column` on, in a single Tcl call."""
+    parent.tk.call('grid', *(widget._w for widget in widgets), '-row', row, '-column', column,
+                   *parent._options(options))
+
+
 def on_error(message: str) -> _.Callable:
     def _on_error(func: OnErrorFunc) -> _.Callable:
+        timed_func = metrics.timed()(func)
+
         @wraps(func)
         def __on_error(self, *args, **kwargs) -> ServiceResult:
             try:
-                result = func(self, *args, **kwargs)
+                result = timed_func(self, *args, **kwargs)
 
                 *is_ok, record_id, msg = result if isinstance(result, tuple) else (True, result, '')
 
@@ -3,14 +3,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 
+import metrics
 import models as m
 import utils
 from db import get_db
 from .modifiers import with_modifiers, command, bind
-from .helpers import on_error, ServiceResult, OnErrorResult
+from .keyed_grid import KeyedGrid
+from .worker import Worker
+from .helpers import on_error, grid_row, ServiceResult, OnErrorResult
+from .styles import use_style
 
 ListenerType = _.Callable[[str, 'TaskRow'], None]
 
+PAGE_SIZE = 50
+
 
 @with_modifiers
 class EntryRow(tk.Frame):
@@ -25,16 +31,20 @@ class EntryRow(tk.Frame):
 
     ALL_KEYS = (MANUAL, START_DATE, START_TIME, STOP_DATE, STOP_TIME, TIME, BT_SAVE, BT_DELETE)
 
-    def __init__(self, root: ttk.Widget, model: m.TaskEntry, listener: ListenerType, **kwargs) -> None:
+    def __init__(self, root: ttk.Widget, model: m.TaskEntry, listener: ListenerType, worker: Worker,
+                 **kwargs) -> None:
         super().__init__(root, **kwargs)
 
         self.root = root
         self.model = model
         self.listener = listener
+        self.worker = worker
 
         self._controls: dict[str, ttk.Widget] = {}
         self._variables: dict[str, tk.Variable] = {}
         self._changed: list[str] = []
+        self._values: tuple | None = None
+        self._states: dict[str, str] = {}
 
         self.build()
         self.init_position()
@@ -43,12 +53,6 @@ class EntryRow(tk.Frame):
 
     # region Build
     def build(self) -> None:
-        style = ttk.Style(self)
-        style.map(
-            "EntryRow.TButton",
-            foreground=[("disabled", "DarkGrey")]
-        )
-
         defaults = {'width': 1}
         self._variables[self.MANUAL] = manual = tk.BooleanVar()
         self._controls[self.MANUAL] = ttk.Checkbutton(self, variable=manual, state='disabled', **defaults)
@@ -70,40 +74,56 @@ class EntryRow(tk.Frame):
         self._controls[self.TIME] = ttk.Label(self, textvariable=time, **defaults)
 
         # defaults = {'width': 1}
-        defaults = {'width': 1, 'style': 'EntryRow.TButton'}
+        defaults = {'width': 1, 'style': use_style(self, 'EntryRow.TButton')}
         self._controls[self.BT_SAVE] = ttk.Button(self, text='V', **defaults)
         self._controls[self.BT_DELETE] = ttk.Button(self, text='X', **defaults)
 
     def init_position(self) -> None:
-        defaults = {'pady': 1, 'padx': 1, 'row': 0, 'sticky': tk.EW}
-        self._controls[self.MANUAL].grid(column=0, **defaults)
-        self._controls[self.START_DATE].grid(column=1, **defaults)
-        self._controls[self.START_TIME].grid(column=2, **defaults)
-        self._controls[self.STOP_DATE].grid(column=3, **defaults)
-        self._controls[self.STOP_TIME].grid(column=4, **defaults)
-        self._controls[self.TIME].grid(column=5, **defaults)
-        self._controls[self.BT_SAVE].grid(column=6, **defaults)
-        self._controls[self.BT_DELETE].grid(column=7, **defaults)
+        grid_row(self, [self._controls[key] for key in self.ALL_KEYS], pady=1, padx=1, sticky=tk.EW)
 
     def refresh(self) -> None:
         if self.model is None:
-            self._controls[self.START_DATE].configure({'state': 'disabled'})
-            self._controls[self.START_TIME].configure({'state': 'disabled'})
-            self._controls[self.STOP_DATE].configure({'state': 'disabled'})
-            self._controls[self.STOP_TIME].configure({'state': 'disabled'})
-            self._controls[self.BT_SAVE].configure({'state': 'disabled'})
-            self._controls[self.BT_DELETE].configure({'state': 'disabled'})
+            self.set_state(self.START_DATE, 'disabled')
+            self.set_state(self.START_TIME, 'disabled')
+            self.set_state(self.STOP_DATE, 'disabled')
+            self.set_state(self.STOP_TIME, 'disabled')
+            self.set_state(self.BT_SAVE, 'disabled')
+            self.set_state(self.BT_DELETE, 'disabled')
         else:
             bt_save = 'enabled' if len(self._changed) != 0 else 'disabled'
-            self._controls[self.START_DATE].configure({'state': 'enabled'})
-            self._controls[self.START_TIME].configure({'state': 'enabled'})
-            self._controls[self.STOP_DATE].configure({'state': 'enabled'})
-            self._controls[self.STOP_TIME].configure({'state': 'enabled'})
-            self._controls[self.BT_SAVE].configure({'state': bt_save})
-            self._controls[self.BT_DELETE].configure({'state': 'enabled'})
+            self.set_state(self.START_DATE, 'enabled')
+            self.set_state(self.START_TIME, 'enabled')
+            self.set_state(self.STOP_DATE, 'enabled')
+            self.set_state(self.STOP_TIME, 'enabled')
+            self.set_state(self.BT_SAVE, bt_save)
+            self.set_state(self.BT_DELETE, 'enabled')
+
+    def set_state(self, key: str, state: str) -> None:
+        """Only configure the widget when its state changes."""
+        if self._states.get(key) != state:
+            self._states[key] = state
+            self._controls[key].configure({'state': state})
+
+    def set_model(self, model: m.TaskEntry | None) -> None:
+        """Every load brings new objects, the row is only reset when its entry or its values changed."""
+        values = self.model_values(model)
+        editing = self._changed and values is not None and self._values is not None and values[0] == self._values[0]
+
+        self.model = model
+        if values != self._values and not editing:  # Pending edits of the same entry are kept
+            self.refresh_values()
+            self.refresh()
+
+    def model_values(self, model: m.TaskEntry | None) -> tuple | None:
+        if model is None:
+            return None
+
+        with get_db().session():
+            return model.id, model.start, model.stop, model.manual
 
     def refresh_values(self) -> None:
         self._changed.clear()
+        self._values = self.model_values(self.model)
 
         if self.model is None:
             self._variables[self.MANUAL].set(value=False)
@@ -161,35 +181,45 @@ class EntryRow(tk.Frame):
         time = self._variables[self.STOP_TIME].get()
         stop = datetime.strptime(f'{date} {time}', '%d-%m-%Y %H:%M:%S')
 
-        result: ServiceResult
-        if result := self.save_entry(entry_id, task_id, start, stop):
-            with get_db().session():
-                self.model = m.TaskEntry.find(result.record_id)
+        self.set_state(self.BT_SAVE, 'disabled')
+        self.worker.submit(self.save_entry, entry_id, task_id, start, stop, callback=self.saved_entry)
 
-            self.refresh_values()
-            self.refresh()
+    def saved_entry(self, result: ServiceResult) -> None:
+        """The saved entry comes back with the page, reloaded by the listener."""
+        if not self.winfo_exists():  # Closed while the worker ran
+            result.show_message()
+            return
+        if result:
+            self._changed.clear()
+        self.refresh()
 
         result.show_message()
 
-        if callable(self.listener):
+        if result and callable(self.listener):
             self.listener('save', self)
 
     @command(BT_DELETE)
     def clicked_delete(self) -> None:
+        model = self.model
         with get_db().session():
-            entry_id = self.model.id
+            entry_id = model.id
 
         if messagebox.askyesno('Delete row', 'Do you want to delete the entry?'):
-            result: ServiceResult
-            if result := self.delete_entry(entry_id):
-                self.model = None
-                self.refresh_values()
-                self.refresh()
+            self.set_state(self.BT_DELETE, 'disabled')
+            self.worker.submit(self.delete_entry, entry_id, callback=lambda result: self.deleted_entry(result, model))
 
+    def deleted_entry(self, result: ServiceResult, model: m.TaskEntry) -> None:
+        """The row may show another entry by the time the worker is done."""
+        if not self.winfo_exists():  # Closed while the worker ran
             result.show_message()
+            return
+        if model is self.model:
+            if result and callable(self.listener):
+                self.listener('delete', self)
+            else:
+                self.refresh()
 
-        if callable(self.listener):
-            self.listener('delete', self)
+        result.show_message()
 
     @bind('<FocusIn>', START_DATE)
     @bind('<FocusIn>', START_TIME)
@@ -235,19 +265,29 @@ class TaskInfoForm(tk.Toplevel):
     NAME = 'NAME'
     FR_TOP = 'FR_TOP'
     FR_BOTTOM = 'FR_BOTTOM'
+    FR_PAGES = 'FR_PAGES'
     BT_SAVE_TASK = 'BT_SAVE_TASK'
     BT_ADD_ENTRY = 'BT_ADD_ENTRY'
     BT_REFRESH = 'BT_REFRESH'
+    BT_NEWER = 'BT_NEWER'
+    BT_OLDER = 'BT_OLDER'
+    PAGE = 'PAGE'
 
-    def __init__(self, root: tk.Tk | ttk.Frame, model: m.Task, **kwargs) -> None:
+    def __init__(self, root: tk.Tk | ttk.Frame, task_id: int, worker: Worker = None, **kwargs) -> None:
         super().__init__(root, **kwargs)
 
         self.root = root
-        self.model = model
+        self.task_id = task_id
+        self.worker = worker or Worker(self)
 
         self._controls: dict[str, ttk.Widget] = {}
         self._variables: dict[str, tk.Variable] = {}
-        self._grid: list[EntryRow] = []
+        self._grid: KeyedGrid | None = None
+        self._cursors: list[tuple[datetime, int] | None] = [None]  # One keyset cursor per page, newest first
+        self._page: list[m.TaskEntry] = []
+        self._pending: list[m.TaskEntry] = []  # Added, not saved yet
+        self._has_older = False
+        self._page_request = 0  # Only the last requested page is shown
 
         self.build()
         self.init_position()
@@ -256,11 +296,11 @@ class TaskInfoForm(tk.Toplevel):
 
     # region Build
     def build(self) -> None:
-        with get_db().session():
-            self.title(f'Information: {self.model.project.name} - {self.model.name}')
+        self.title('Information')
 
         self._controls[self.FR_TOP] = top = ttk.Frame(self)
-        self._controls[self.FR_BOTTOM] = ttk.Frame(self)
+        self._controls[self.FR_BOTTOM] = bottom = ttk.Frame(self)
+        self._grid = KeyedGrid(bottom, row_factory=self.build_row, key=self.entry_key)
 
         self._variables[self.PROJECT_NAME] = proj_name = tk.StringVar()
         self._controls[self.PROJECT_NAME] = ttk.Label(top, textvariable=proj_name, font=("Arial", 25))
@@ -272,6 +312,12 @@ class TaskInfoForm(tk.Toplevel):
         self._controls[self.BT_ADD_ENTRY] = ttk.Button(top, text='Add')
         self._controls[self.BT_REFRESH] = ttk.Button(top, text='Refresh')
 
+        self._controls[self.FR_PAGES] = pages = ttk.Frame(self)
+        self._controls[self.BT_NEWER] = ttk.Button(pages, text='<')
+        self._variables[self.PAGE] = page = tk.StringVar()
+        self._controls[self.PAGE] = ttk.Label(pages, textvariable=page, anchor=tk.CENTER)
+        self._controls[self.BT_OLDER] = ttk.Button(pages, text='>')
+
     def init_position(self) -> None:
         # Bring to top
         self.attributes("-topmost", True)
@@ -291,51 +337,114 @@ class TaskInfoForm(tk.Toplevel):
         self._controls[self.BT_ADD_ENTRY].grid(row=1,column=2, **defaults)
         self._controls[self.BT_REFRESH].grid(row=1,column=3, **defaults)
 
+        self._controls[self.FR_PAGES].grid(row=2, column=1, sticky=tk.EW)
+        self._controls[self.FR_PAGES].grid_columnconfigure(1, weight=1)
+        self._controls[self.BT_NEWER].grid(row=0, column=0, **defaults)
+        self._controls[self.PAGE].grid(row=0, column=1, **defaults)
+        self._controls[self.BT_OLDER].grid(row=0, column=2, **defaults)
+
     def refresh(self) -> None:
-        pass
+        bt_newer = 'enabled' if len(self._cursors) > 1 else 'disabled'
+        bt_older = 'enabled' if self._has_older else 'disabled'
+
+        self._controls[self.BT_NEWER].configure({'state': bt_newer})
+        self._controls[self.BT_OLDER].configure({'state': bt_older})
+        self._variables[self.PAGE].set(f'Page {len(self._cursors)}')
 
     def refresh_grid(self) -> None:
-        self.clean_grid()
         self.populate_grid()
         self.refresh()
 
+    def build_row(self, root: tk.Misc) -> EntryRow:
+        return EntryRow(root, model=None, listener=self.listener, worker=self.worker)
+
     def clean_grid(self) -> None:
-        for row in self._grid:
-            row.destroy()
         self._grid.clear()
 
     def populate_grid(self) -> None:
+        """Load the current page in the worker, one entry more tells if there is an older page."""
+        self._page_request += 1
+        request = self._page_request
+
+        self.worker.submit(self.load_page, self.task_id, self._cursors[-1],
+                           callback=lambda entries: self.populated_grid(request, entries))
+
+    def populated_grid(self, request: int, entries: list[m.TaskEntry]) -> None:
+        if not self.winfo_exists():  # Closed while the worker ran
+            return
+
+        if request == self._page_request:
+            self._has_older = len(entries) > PAGE_SIZE
+            self._page = entries[:PAGE_SIZE]
+            self.show_page()
+            self.refresh()
+        else:
+            metrics.count('gui.info_form.stale_loads')
+
+    def show_page(self) -> None:
         with get_db().session():
-            for idx, entry in enumerate(self.model.entries):
-                entry_row = EntryRow(self._controls[self.FR_BOTTOM], model=entry, listener=self.listener)
-                entry_row.grid(row=idx, column=0, sticky=tk.EW)
-                self._grid.append(entry_row)
+            self._grid.update([*self._pending, *self._page])
 
     def refresh_values(self) -> None:
-        with get_db().session():
-            self._variables[self.PROJECT_NAME].set(self.model.project.name)
-            self._variables[self.NAME].set(self.model.name)
+        self.worker.submit(self.load_names, self.task_id, callback=self.populated_values)
+
+    def populated_values(self, names: tuple[str, str]) -> None:
+        if not self.winfo_exists():
+            return
+
+        project_name, task_name = names
+        self.title(f'Information: {project_name} - {task_name}')
+        self._variables[self.PROJECT_NAME].set(project_name)
+        self._variables[self.NAME].set(task_name)
     # endregion
 
     # region Helpers
+    @staticmethod
+    def entry_key(entry: m.TaskEntry) -> int:
+        """Entries not saved yet have no id, they are keyed by identity until they get one."""
+        with get_db().session():
+            return entry.id if entry.id is not None else id(entry)
+
     def listener(self, event: str, row: EntryRow) -> None:
         if event == 'delete':
-            row.destroy()
+            self._grid.remove(row)
+            self.refresh_grid()
+        elif event == 'save':
+            key = self._grid.key_of(row)
+            self._pending = [e for e in self._pending if self.entry_key(e) != key]
+            self._grid.rekey()
             self.refresh_grid()
         else:
             print(f'Info: {event}: {row}')
     # endregion
 
     # region Services
+    @staticmethod
+    @metrics.timed()
+    def load_names(task_id: int) -> tuple[str, str]:
+        with get_db().session():
+            task = m.Task.find(task_id)
+            return task.project.name, task.name
+
+    @staticmethod
+    @metrics.timed()
+    def load_page(task_id: int, before: tuple[datetime, int] | None) -> list[m.TaskEntry]:
+        """Runs in the worker, the entries are detached so the Tk thread can read them."""
+        with get_db().session() as session:
+            entries = m.TaskEntry.page(task_id, before=before, limit=PAGE_SIZE + 1)
+            for entry in entries:
+                session.expunge(entry)
+
+        return entries
+
     def add_entry(self) -> bool:
         with get_db().session():
-            entry = m.TaskEntry(task_id=self.model.id, manual=True)
+            entry = m.TaskEntry(task_id=self.task_id, manual=True)
             entry.set_start()
             entry.set_stop()
 
-        entry_row = EntryRow(self._controls[self.FR_BOTTOM], entry, self.listener)
-        entry_row.grid(row=len(self._grid), column=0, sticky=tk.EW)
-        self._grid.append(entry_row)
+        self._pending.insert(0, entry)
+        self.show_page()
         return True
 
     @on_error('Failed to save task')
@@ -354,19 +463,36 @@ class TaskInfoForm(tk.Toplevel):
     def clicked_refresh(self) -> None:
         self.refresh_grid()
 
+    @command(BT_NEWER)
+    def clicked_newer(self) -> None:
+        if len(self._cursors) > 1:
+            self._cursors.pop()
+            self.refresh_grid()
+
+    @command(BT_OLDER)
+    def clicked_older(self) -> None:
+        if self._has_older and self._page:
+            with get_db().session():
+                self._cursors.append(self._page[-1].cursor)
+            self.refresh_grid()
+
     @command(BT_ADD_ENTRY)
     def clicked_add_entry(self) -> None:
         self.add_entry()
 
     @command(BT_SAVE_TASK)
     def clicked_save_task(self) -> None:
-        with get_db().session():
-            task_id = self.model.id
-
         task_name = self._variables[self.NAME].get()
 
-        result: ServiceResult
-        if result := self.save_task(task_id, task_name):
+        self._controls[self.BT_SAVE_TASK].configure({'state': 'disabled'})
+        self.worker.submit(self.save_task, self.task_id, task_name, callback=self.saved_task)
+
+    def saved_task(self, result: ServiceResult) -> None:
+        if not self.winfo_exists():  # Closed while the worker ran
+            result.show_message()
+            return
+        self._controls[self.BT_SAVE_TASK].configure({'state': 'enabled'})
+        if result:
             self.refresh_values()
         result.show_message()
     # endregion
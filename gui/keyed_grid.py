@@ -0,0 +1,81 @@
+import typing as _
+import tkinter as tk
+
+from .virtual_list import VirtualRow, RowFactory, KeyFunc
+
+
+class KeyedGrid:
+    """
+    Rows of a frame, one per item, updated by diff.
+
+    `update` only creates, removes or rebinds the rows whose item was added, removed
+    or changed. Removed rows go back to a pool and are reused for the next new items.
+    """
+
+    def __init__(self, frame: tk.Misc, row_factory: RowFactory, key: KeyFunc, **grid_options: _.Any) -> None:
+        self.frame = frame
+        self.row_factory = row_factory
+        self.key = key
+        self.grid_options = {'column': 0, 'sticky': tk.EW, **grid_options}
+
+        self._rows: dict[_.Hashable, VirtualRow] = {}
+        self._positions: dict[int, int] = {}
+        self._pool: list[VirtualRow] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> _.Iterator[VirtualRow]:
+        return iter(list(self._rows.values()))
+
+    def acquire(self) -> VirtualRow:
+        return self._pool.pop() if self._pool else self.row_factory(self.frame)
+
+    def release(self, row: VirtualRow) -> None:
+        row.set_model(None)
+        row.grid_forget()
+        self._positions.pop(id(row), None)
+        self._pool.append(row)
+
+    def place(self, row: VirtualRow, position: int) -> None:
+        if self._positions.get(id(row)) != position:
+            self._positions[id(row)] = position
+            row.grid(row=position, **self.grid_options)
+
+    def update(self, items: _.Iterable[_.Any]) -> None:
+        items = list(items)
+        keys = [self.key(item) for item in items]
+
+        for key in self._rows.keys() - set(keys):
+            self.release(self._rows.pop(key))
+
+        for position, (key, item) in enumerate(zip(keys, items)):
+            if (row := self._rows.get(key)) is None:
+                self._rows[key] = row = self.acquire()
+            row.set_model(item)
+            self.place(row, position)
+
+    def append(self, item: _.Any) -> VirtualRow:
+        row = self.acquire()
+        row.set_model(item)
+        self.place(row, max(self._positions.values(), default=-1) + 1)
+        self._rows[self.key(item)] = row
+        return row
+
+    def remove(self, row: VirtualRow) -> None:
+        if (key := self.key_of(row)) is not None:
+            del self._rows[key]
+            self.release(row)
+
+    def key_of(self, row: VirtualRow) -> _.Hashable | None:
+        for key, cur in self._rows.items():
+            if cur is row:
+                return key
+        return None
+
+    def rekey(self) -> None:
+        """Index the rows again, after their models changed key (e.g. an entry got its id)."""
+        self._rows = {self.key(row.model): row for row in self._rows.values() if row.model is not None}
+
+    def clear(self) -> None:
+        self.update([])
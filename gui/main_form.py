@@ -1,18 +1,30 @@
 import typing as _
+import bisect
 from datetime import datetime, timedelta
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 
+import metrics
 import models as m
+import reports
+import timers
 from db import get_db
 
 from .modifiers import with_modifiers, command, bind, menu
-from .info_form import TaskInfoForm
-from .helpers import on_error, OnErrorResult, ServiceResult
+from .ticker import Ticker
+from .virtual_list import VirtualList
+from .worker import Worker
+from .helpers import on_error, grid_row, OnErrorResult, ServiceResult
+from .styles import use_style
 
 ListenerType = _.Callable[[str, 'TaskRow'], None]
 
+PROJECT_LIMIT = 50  # Names listed by the project picker
+SEARCH_DELAY = 150  # ms after the last key before searching the projects
+NAVIGATION_KEYS = frozenset({'Up', 'Down', 'Left', 'Right', 'Home', 'End', 'Return', 'KP_Enter', 'Escape', 'Tab',
+                             'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R'})
+
 
 @with_modifiers
 class TaskRow(ttk.Frame):
@@ -24,19 +36,20 @@ class TaskRow(ttk.Frame):
     BT_DELETE = 'BT_DELETE'
     BT_INFO = 'BT_INFO'
 
-    def __init__(self, root: tk.Misc, model: m.Task, listener: ListenerType = None, **kwargs) -> None:
+    def __init__(self, root: tk.Misc, model: m.TaskSnapshot | None, timers: timers.TimerRegistry, worker: Worker,
+                 listener: ListenerType = None, **kwargs) -> None:
         super().__init__(root, **kwargs)
 
         self.root = root  # No master
         self.model = model
+        self.timers = timers
+        self.worker = worker
         self.listener = listener
 
         self._controls: dict[str, ttk.Widget] = {}
         self._variables: dict[str, tk.Variable] = {}
-        self._column = -1
-        self._play = False
-        self._play_id = None
-        self._cur_entry = None
+        self._texts: dict[str, str] = {}
+        self._states: dict[str, str] = {}
 
         self.build()
         self.init_position()
@@ -44,18 +57,7 @@ class TaskRow(ttk.Frame):
         self.refresh_values()
 
     # region Build
-    @property
-    def position_attributes(self):
-        self._column += 1
-        return {'pady': 5, 'padx': 5, 'sticky': tk.EW, 'row': 0, 'column': self._column}
-
     def build(self) -> None:
-        style = ttk.Style()
-        style.map(
-            "TaskFrame.TButton",
-            foreground=[("disabled", "DarkGrey")]
-        )
-
         self._variables[self.DONE] = done = tk.BooleanVar()
         self._controls[self.DONE] = ttk.Checkbutton(self, width=1, variable=done)
 
@@ -69,7 +71,7 @@ class TaskRow(ttk.Frame):
         self._variables[self.TODAY] = today = tk.StringVar()
         self._controls[self.TODAY] = ttk.Label(self, textvariable=today, **lb_defaults)
 
-        bt_defaults = {'width': 2, 'style': 'TaskFrame.TButton'}
+        bt_defaults = {'width': 2, 'style': use_style(self, 'TaskFrame.TButton')}
         self._variables[self.BT_PLAY] = play = tk.StringVar(value='>')
         self._controls[self.BT_PLAY] = ttk.Button(self, textvariable=play, **bt_defaults)
 
@@ -79,88 +81,114 @@ class TaskRow(ttk.Frame):
     def init_position(self) -> None:
         self.grid_columnconfigure(1, weight=1)
 
-        self._controls[self.DONE].grid(**self.position_attributes)
-        self._controls[self.NAME].grid(**self.position_attributes)
-        self._controls[self.TOTAL].grid(**self.position_attributes)
-        self._controls[self.TODAY].grid(**self.position_attributes)
-        self._controls[self.BT_PLAY].grid(**self.position_attributes)
-        self._controls[self.BT_DELETE].grid(**self.position_attributes)
-        self._controls[self.BT_INFO].grid(**self.position_attributes)
+        keys = (self.DONE, self.NAME, self.TOTAL, self.TODAY, self.BT_PLAY, self.BT_DELETE, self.BT_INFO)
+        grid_row(self, [self._controls[key] for key in keys], pady=5, padx=5, sticky=tk.EW)
+
+    @property
+    def is_running(self) -> bool:
+        return self.model is not None and self.model.id in self.timers
+
+    @property
+    def is_saving(self) -> bool:
+        return self.model is not None and self.model.id in self.timers.saving
 
     def refresh(self) -> None:
-        is_gone = self.model is None
-        is_play = self._play
+        is_idle = self.model is not None and not self.is_saving
+        is_play = self.is_running
         is_done = self._variables[self.DONE].get()
 
-        bt_play = 'enabled' if not is_gone and not is_done else 'disabled'
-        in_done = bt_delete = bt_info = 'enabled' if not is_gone and not is_play else 'disabled'
+        self.set_text(self.BT_PLAY, '||' if is_play else '>')
+
+        bt_play = 'enabled' if is_idle and not is_done else 'disabled'
+        in_done = bt_delete = bt_info = 'enabled' if is_idle and not is_play else 'disabled'
 
-        self._controls[self.DONE].configure({'state': in_done})
-        self._controls[self.BT_PLAY].configure({'state': bt_play})
-        self._controls[self.BT_DELETE].configure({'state': bt_delete})
-        self._controls[self.BT_INFO].configure({'state': bt_info})
+        self.set_state(self.DONE, in_done)
+        self.set_state(self.BT_PLAY, bt_play)
+        self.set_state(self.BT_DELETE, bt_delete)
+        self.set_state(self.BT_INFO, bt_info)
 
     def refresh_values(self) -> None:
         if self.model:
-            with get_db().session():
-                self._variables[self.DONE].set(self.model.state == m.State.CONCLUDED)
-                self._variables[self.NAME].set(self.model.name)
-                self._variables[self.TOTAL].set(self.format_time(self.model.elapsed_seconds))
-                self._variables[self.TODAY].set(self.format_time(self.model.today_seconds))
-
+            self._variables[self.DONE].set(self.model.state == m.State.CONCLUDED)
+            self.set_text(self.NAME, self.model.name)
         else:
             self._variables[self.DONE].set(False)
-            self._variables[self.NAME].set('')
-            self._variables[self.TOTAL].set(self.format_time(0))
-            self._variables[self.TODAY].set(self.format_time(0))
+            self.set_text(self.NAME, '')
 
-    def refresh_timers(self) -> None:
-        with get_db().session():
-            seconds = 0
-            if self._cur_entry is not None:
-                self._cur_entry.set_stop()
-                seconds = self._cur_entry.elapsed_seconds
+        self.refresh_timers()
 
-            total = self.model.elapsed_seconds + seconds
-            today = self.model.today_seconds + seconds
+    def refresh_timers(self, now: datetime = None) -> None:
+        if timer := self.model and self.timers.get(self.model.id):
+            total, today = timer.totals(now)
+        elif self.model:
+            total, today = self.model.totals.elapsed_seconds, self.model.totals.today_seconds
+        else:
+            total = today = 0
 
-        self._variables[self.TOTAL].set(self.format_time(total))
-        self._variables[self.TODAY].set(self.format_time(today))
+        self.set_text(self.TOTAL, self.format_time(total))
+        self.set_text(self.TODAY, self.format_time(today))
     # endregion
 
     # region Helpers
     def format_time(self, seconds: int) -> str:
         total = datetime(2023, 1, 1) + timedelta(seconds=seconds)
         return total.strftime('%H:%M:%S')
+
+    def set_text(self, key: str, text: str) -> None:
+        """Only write the Tk variable when the displayed text changes."""
+        if self._texts.get(key) != text:
+            self._texts[key] = text
+            self._variables[key].set(text)
+
+    def set_state(self, key: str, state: str) -> None:
+        """Only configure the widget when its state changes."""
+        if self._states.get(key) != state:
+            self._states[key] = state
+            self._controls[key].configure({'state': state})
+
+    def set_model(self, model: m.TaskSnapshot | None) -> None:
+        if model != self.model:
+            self.model = model
+            self.refresh_values()
+            self.refresh()
+
+    def shows(self, task_id: int) -> bool:
+        """The row may be bound to another task by the time a worker job comes back."""
+        return self.model is not None and self.model.id == task_id
     # endregion
 
     # region Services
-    def start_timer(self) -> None:
+    @on_error('Failed to start the timer')
+    def open_timer(self, timer: timers.RunningTimer) -> OnErrorResult:
+        timer.open_entry()
+
         with get_db().session() as session:
-            self._cur_entry = m.TaskEntry(task_id=self.model.id, manual=False)
-            self._cur_entry.set_start()
-            self._cur_entry.set_stop()
+            task = m.Task.find(timer.task_id)
+            if task.state != m.State.INPROGRESS:
+                task.state = m.State.INPROGRESS
+                session.add(task)
 
-            if self.model.state != m.State.INPROGRESS:
-                self.model.state = m.State.INPROGRESS
-                session.add(self.model)
+        return timer.task_id
 
-    def stop_timer(self) -> None:
+    @on_error('Failed to stop the timer')
+    def close_timer(self, timer: timers.RunningTimer, stop: datetime) -> OnErrorResult:
+        timer.close_entry(stop)
+        return timer.task_id
+
+    @on_error('Failed to change the task state')
+    def save_state(self, task_id: int, state: m.State) -> OnErrorResult:
         with get_db().session() as session:
-            self._cur_entry.set_stop()
-            session.add(self._cur_entry)
+            if task := m.Task.find(task_id):
+                task.state = state
+                session.add(task)
+                return task_id
 
-        self._cur_entry = None
-
-    def run_timer(self) -> None:
-        if self._play:
-            self.refresh_timers()
-            self._play_id = self.after(1000, self.run_timer)
+        return False, task_id, 'Failed to change the task state.'
 
     @on_error('Failed to delete the task')
     def delete_task(self, project_id: int, name: str) -> OnErrorResult:
         with get_db().session() as session:
-            if task := m.Task.find_name(project_id, name):
+            if (task_id := m.Task.find_id(project_id, name)) and (task := session.get(m.Task, task_id)):
                 task.state = m.State.DELETED
                 session.add(task)
                 return task.id
@@ -171,48 +199,85 @@ class TaskRow(ttk.Frame):
     # region Events
     @command(DONE)
     def changed_done(self) -> None:
+        task_id = self.model.id
         state = m.State.CONCLUDED if self._variables[self.DONE].get() else m.State.INPROGRESS
 
-        with get_db().session() as session:
-            self.model.state = state
-            session.add(self.model)
+        self.set_state(self.DONE, 'disabled')
+        self.worker.submit(self.save_state, task_id, state,
+                           callback=lambda result: self.saved_state(result, task_id, state))
 
-        self.refresh()
+    def saved_state(self, result: ServiceResult, task_id: int, state: m.State) -> None:
+        if self.shows(task_id):
+            if result:
+                self.model = self.model._replace(state=state)
+            self.refresh_values()  # Unchecks the box again when it failed
+            self.refresh()
+
+            if result and self.listener is not None:
+                self.listener('done', self)
+
+        result.show_message()
 
     @command(BT_PLAY)
     def clicked_play(self) -> None:
-        self._play = not self._play
-        self._variables[self.BT_PLAY].set('||' if self._play else '>')
-
-        if self._play:
-            self.start_timer()
-            self.run_timer()
+        """The timer starts or stops now, its entry is saved by the worker."""
+        task_id, now = self.model.id, datetime.now()
+
+        if self.is_running:
+            timer = self.timers.stop(task_id)
+            total, today = timer.totals(now)
+            self.model = self.model._replace(
+                totals=self.model.totals._replace(elapsed_seconds=total, today_seconds=today, day=now.date()))
+            self.worker.submit(self.close_timer, timer, now,
+                               callback=lambda result: self.saved_timer(result, timer, started=False))
         else:
-            self.stop_timer()
-            self.after_cancel(self._play_id)
+            timer = self.timers.start(task_id, self.model.totals, now)
+            self.model = self.model._replace(state=m.State.INPROGRESS)
+            self.worker.submit(self.open_timer, timer,
+                               callback=lambda result: self.saved_timer(result, timer, started=True))
 
+        self.timers.saving.add(task_id)
+        self.refresh_timers()
         self.refresh()
 
         if self.listener is not None:
             self.listener('play', self)
 
+    def saved_timer(self, result: ServiceResult, timer: timers.RunningTimer, started: bool) -> None:
+        self.timers.saving.discard(timer.task_id)
+        if not result and started:
+            self.timers.stop(timer.task_id)
+        elif not result:
+            self.timers.start(timer.task_id, timer.baseline, timer.start).entry_id = timer.entry_id  # Still running
+
+        if self.shows(timer.task_id):
+            self.refresh_timers()
+            self.refresh()
+
+            if not result and self.listener is not None:
+                self.listener('play', self)
+
+        result.show_message()
+
     @command(BT_DELETE)
     def clicked_delete(self) -> None:
-        with get_db().session():
-            project_id = self.model.project_id
-            task_name = self.model.name
+        task_id = self.model.id
+        project_id = self.model.project_id
+        task_name = self.model.name
 
         if messagebox.askyesno('Delete task', f'Do you want to delete the task {task_name}'):
-            result: ServiceResult
-            if result := self.delete_task(project_id, task_name):
-                self.model = None
-                self.refresh_values()
+            self.set_state(self.BT_DELETE, 'disabled')
+            self.worker.submit(self.delete_task, project_id, task_name,
+                               callback=lambda result: self.deleted_task(result, task_id))
+
+    def deleted_task(self, result: ServiceResult, task_id: int) -> None:
+        if self.shows(task_id):
+            if result and self.listener is not None:
+                self.listener('delete', self)
+            else:
                 self.refresh()
 
-            result.show_message()
-
-        if self.listener is not None:
-            self.listener('delete', self)
+        result.show_message()
 
     @command(BT_INFO)
     def clicked_info(self) -> None:
@@ -232,31 +297,44 @@ class MainForm(ttk.Frame):
     MN_REPORT = 'MN_REPORT'
     MN_PROJECT = 'MN_PROJECT'
 
-    def __init__(self, root: tk.Tk, **kwargs) -> None:
+    def __init__(self, root: tk.Tk, checkpoint_interval: int = timers.CHECKPOINT_INTERVAL, **kwargs) -> None:
         super().__init__(root, **kwargs)
 
         self.root: tk.Tk = root  # No master
-        self._cur_project: m.Project | None = None
+        self._cur_project_id: int | None = None
+        self._cur_project_name = ''
         self._controls: dict[str, ttk.Widget] = {}
         self._variables: dict[str, tk.Variable] = {}
         self._menus: dict[str, tk.Menu] = {}
-        self._grid: list[ttk.Widget] = []
+        self._timers = timers.TimerRegistry(checkpoint_interval)
+        self._ticker = Ticker(self)
+        self._grid_request = 0  # Only the last requested load of the grid is shown
+        self._project_request = 0  # Same for the names of the project picker
+        self._select_request = 0  # And for the selected project
+        self._project_prefix = ''
+        self._project_names: list[str] = []
+        self._project_search: str | None = None  # Pending `after` of the type-ahead
+        self.worker = Worker(self)
 
         self.build()
         self.build_menu()
         self.init_position()
         self.refresh_grid()
         self.refresh_projects()
+        self.resume_timers()
+
+        self.bind('<Destroy>', self.destroyed)
 
     # region Build
     def build(self) -> None:
         self.root.title('Time tracker')
 
         self._controls[self.FR_TOP] = fr_top = ttk.Frame(self)
-        self._controls[self.FR_BOTTOM] = ttk.Frame(self)
+        self._controls[self.FR_BOTTOM] = VirtualList(self, row_factory=self.build_row,
+                                                         key=lambda task: task.id, order=lambda task: task.name)
 
         self._variables[self.PROJECT] = project = tk.StringVar()
-        self._controls[self.PROJECT] = ttk.Combobox(fr_top, textvariable=project, state='readonly')
+        self._controls[self.PROJECT] = ttk.Combobox(fr_top, textvariable=project)
 
         self._variables[self.TASK] = task = tk.StringVar()
         self._controls[self.TASK] = ttk.Entry(fr_top, textvariable=task)
@@ -270,8 +348,8 @@ class MainForm(ttk.Frame):
         self._menus[self.MN_MAIN] = menubar = tk.Menu(self.master)
 
         self._menus[self.MN_REPORT] = menu_report = tk.Menu(menubar)
-        menu_report.add_command(label='Project x Date', state='disabled')
-        menu_report.add_command(label='Date x Project', state='disabled')
+        menu_report.add_command(label=str(reports.Kind.PROJECT_BY_DATE))
+        menu_report.add_command(label=str(reports.Kind.DATE_BY_PROJECT))
 
         self._menus[self.MN_PROJECT] = menu_project = tk.Menu(menubar)
         menu_project.add_command(label='New project')
@@ -283,16 +361,20 @@ class MainForm(ttk.Frame):
         menubar.add_cascade(menu=menu_report, label='Report')
         self.master['menu'] = menubar
 
+    def build_row(self, root: tk.Misc) -> TaskRow:
+        return TaskRow(root, model=None, timers=self._timers, worker=self.worker, listener=self.listener)
+
     def init_position(self) -> None:
+        self.root.grid_rowconfigure(0, weight=1)
         self.grid(row=0, column=0, sticky=tk.NSEW)
         self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
 
         defaults = {'sticky': tk.EW}
         self._controls[self.FR_TOP].grid(row=0, column=0, **defaults)
         self._controls[self.FR_TOP].grid_columnconfigure(3, weight=1)
 
-        self._controls[self.FR_BOTTOM].grid(row=1, column=0, **defaults)
-        self._controls[self.FR_BOTTOM].grid_columnconfigure(0, weight=1)
+        self._controls[self.FR_BOTTOM].grid(row=1, column=0, sticky=tk.NSEW)
 
         defaults = {'pady': 5, 'padx': 5, 'sticky': tk.EW}
         self._controls[self.PROJECT].grid(row=0, column=0, **defaults)
@@ -300,7 +382,7 @@ class MainForm(ttk.Frame):
         self._controls[self.BT_ADD_TASK].grid(row=0, column=2, **defaults)
 
     def refresh(self) -> None:
-        has_project = self._cur_project is not None
+        has_project = self._cur_project_id is not None
         has_task = self._variables[self.TASK].get() != ''
 
         mn_project_edit = mn_project_delete = 'normal' if has_project else 'disabled'
@@ -314,52 +396,158 @@ class MainForm(ttk.Frame):
         self._controls[self.TASK].configure({'state': in_task})
 
     def refresh_grid(self) -> None:
-        self.clean_grid()
         self.populate_grid()
         self.refresh()
 
     def clean_grid(self) -> None:
-        for row in self._grid:
-            row.destroy()
-
-        self._grid.clear()
+        self._controls[self.FR_BOTTOM].set_items([])
 
     def populate_grid(self) -> None:
-        with get_db().session():
-            if self._cur_project is not None:
-                for idx, task in enumerate(self._cur_project.tasks):
-                    task_frame = TaskRow(self._controls[self.FR_BOTTOM], model=task, listener=self.listener)
-                    task_frame.grid(row=idx, column=0, sticky=tk.EW)
-                    self._grid.append(task_frame)
+        """Load the tasks in the worker, the rows are replaced when they arrive."""
+        self._grid_request += 1
+        request = self._grid_request
 
-    def refresh_projects(self) -> None:
-        with get_db().session():
-            self._controls[self.PROJECT]['values'] = [p.name for p in m.Project.find_all()]
+        if self._cur_project_id is None:
+            self.clean_grid()
+            return
 
-    def refresh_all(self) -> None:
-        self.refresh_projects()
-        self.refresh_grid()
+        self.worker.submit(self.load_tasks, self._cur_project_id,
+                           callback=lambda tasks: self.populated_grid(request, tasks))
+
+    def populated_grid(self, request: int, tasks: list[m.TaskSnapshot]) -> None:
+        if request == self._grid_request:
+            self._controls[self.FR_BOTTOM].set_items(tasks)
+        else:
+            metrics.count('gui.main_form.stale_loads')
+
+    def refresh_projects(self) -> None:
+        """Load the names starting with the text of the picker in the worker."""
+        self._project_search = None
+        self._project_request += 1
+        request, prefix = self._project_request, self._variables[self.PROJECT].get()
+
+        self.worker.submit(self.load_project_names, prefix,
+                           callback=lambda names: self.populated_projects(request, prefix, names))
+
+    def populated_projects(self, request: int, prefix: str, names: list[str]) -> None:
+        if request == self._project_request:
+            self._project_prefix = prefix
+            self.set_project_names(names)
+        else:
+            metrics.count('gui.main_form.stale_project_loads')
+
+    def set_project_names(self, names: list[str]) -> None:
+        self._project_names = names
+        self._controls[self.PROJECT]['values'] = names
+
+    def update_project_names(self, old_name: str | None, new_name: str | None) -> None:
+        """Apply a created, renamed or deleted project to the listed names, without loading them again."""
+        names = [name for name in self._project_names if name != old_name]
+        if len(names) < len(self._project_names) and len(self._project_names) >= PROJECT_LIMIT:
+            self.refresh_projects()  # A name after the limit takes the free place
+            return
+
+        if new_name and m.nocase(new_name).startswith(m.nocase(self._project_prefix)):
+            names.insert(bisect.bisect([m.nocase(name) for name in names], m.nocase(new_name)), new_name)
+        self.set_project_names(names[:PROJECT_LIMIT])
     # endregion
 
     # region Helpers
+    def tick(self, now: datetime) -> None:
+        for row in self._controls[self.FR_BOTTOM].visible_rows():
+            if row.is_running:
+                row.refresh_timers(now)
+
+        if self._timers.due(now):
+            # A failed checkpoint is only counted, the next one saves the same entries.
+            self.worker.submit(self._timers.save_entries, *self._timers.begin_checkpoint(now),
+                               errback=lambda ex: metrics.count('gui.main_form.checkpoint_errors'))
+
+    def resume_timers(self) -> None:
+        """Pick up the timers still running in the database (command line, crash), or end them."""
+        self.worker.submit(self._timers.left_timers, callback=self.found_left_timers)
+
+    def found_left_timers(self, left: list[timers.RunningTimer]) -> None:
+        if not left:
+            return
+
+        saved = max(timer.saved for timer in left)
+        if messagebox.askyesno('Running timers',
+                               f'Some timers are still running, last saved at {saved:%d-%m-%Y %H:%M}.\n'
+                               'Continue them, counting the time since then?\n'
+                               '(No stops them at their last save)'):
+            if self._timers.resume(left):
+                self._ticker.add(self)
+                for row in self._controls[self.FR_BOTTOM].visible_rows():
+                    row.refresh_timers()
+                    row.refresh()
+        else:
+            self.worker.submit(self._timers.end_left, left)
+
+    def refresh_task(self, task_id: int) -> None:
+        """Reload a single task in the worker and update only its row."""
+        self.worker.submit(self.load_task, task_id, callback=lambda tasks: self.refreshed_task(task_id, tasks))
+
+    def refreshed_task(self, task_id: int, tasks: list[m.TaskSnapshot]) -> None:
+        for task in tasks:
+            if task.project_id == self._cur_project_id:  # Not when another project was selected meanwhile
+                self._controls[self.FR_BOTTOM].upsert(task)
+        if not tasks:
+            self._controls[self.FR_BOTTOM].remove(task_id)
+
     def listener(self, event: str, row: TaskRow) -> None:
         if event == 'delete':
-            row.destroy()
-            self.refresh_grid()
+            self._controls[self.FR_BOTTOM].remove(row.model.id)
+        elif event in ('play', 'done'):
+            self._controls[self.FR_BOTTOM].replace(row.model)
+
+            if len(self._timers) != 0:
+                self._ticker.add(self)
+            else:
+                self._ticker.remove(self)
         elif event == 'info':
-            info_form = TaskInfoForm(self, row.model)
+            task_id = row.model.id
+
+            from .info_form import TaskInfoForm  # Loaded with the first dialog
+
+            info_form = TaskInfoForm(self, task_id, worker=self.worker)
             info_form.wait_window()
 
-            self.refresh_grid()
+            self.refresh_task(task_id)
         else:
             print(event, row)
     # endregion
 
     # region Services
+    @staticmethod
+    @metrics.timed()
+    def load_tasks(project_id: int) -> list[m.TaskSnapshot]:
+        with get_db().session():
+            snapshot = m.Project.load_snapshot(project_id)
+            return snapshot.tasks if snapshot else []
+
+    @staticmethod
+    @metrics.timed()
+    def load_task(task_id: int) -> list[m.TaskSnapshot]:
+        with get_db().session():
+            return m.Task.snapshots(task_ids=[task_id])
+
+    @staticmethod
+    @metrics.timed()
+    def find_project(name: str) -> int | None:
+        with get_db().session():
+            return m.Project.find_id(name)
+
+    @staticmethod
+    @metrics.timed()
+    def load_project_names(prefix: str = '', limit: int = PROJECT_LIMIT) -> list[str]:
+        with get_db().session():
+            return m.Project.names(prefix, limit)
+
     @on_error('Failed to create project')
     def create_project(self, name: str) -> OnErrorResult:
         with get_db().session() as session:
-            if m.Project.find_name(name) is None:
+            if m.Project.find_id(name) is None:
                 project = m.Project(name=name)
                 session.add(project)
                 return project.id
@@ -369,7 +557,7 @@ class MainForm(ttk.Frame):
     @on_error('Failed to edit project')
     def edit_project(self, old_name: str, new_name: str) -> OnErrorResult:
         with get_db().session() as session:
-            if (m.Project.find_name(new_name) is None) and (project := m.Project.find_name(old_name)):
+            if (m.Project.find_id(new_name) is None) and (project := m.Project.find_name(old_name)):
                 project.name = new_name
                 session.add(project)
                 return project.id
@@ -386,27 +574,38 @@ class MainForm(ttk.Frame):
 
         return False, 0, f'Failed to delete the project {name!r}'
 
-    def select_project(self, name: str) -> bool:
-        if name == '':
-            self._cur_project = None
-            self._variables[self.PROJECT].set('')
-            return True
+    def select_project(self, name: str) -> None:
+        """Find the project in the worker, its tasks are loaded once it is selected."""
+        self._select_request += 1
+        request = self._select_request
 
-        with get_db().session():
-            if project := m.Project.find_name(name):
-                self._cur_project = project
-                self._variables[self.PROJECT].set(name)
-                return True
+        if name == '':
+            self.set_project(None, '')
+        else:
+            self.worker.submit(self.find_project, name,
+                               callback=lambda project_id: self.found_project(request, name, project_id))
+
+    def found_project(self, request: int, name: str, project_id: int | None) -> None:
+        if request != self._select_request:
+            metrics.count('gui.main_form.stale_selects')
+        elif project_id is None:
+            messagebox.showerror('Project not found', f'Project {name!r} was not found.')
+        else:
+            self.set_project(project_id, name)
 
-        messagebox.showerror('Project not found', f'Project {name!r} was not found.')
-        return False
+    def set_project(self, project_id: int | None, name: str) -> None:
+        self._cur_project_id = project_id
+        self._cur_project_name = name
+        self._variables[self.PROJECT].set(name)
+        self.refresh_grid()
 
     @on_error('Failed to add task')
     def add_task(self, project_id: int, name: str) -> OnErrorResult:
         with get_db().session() as session:
-            if m.Task.find_name(project_id, name) is None:
+            if m.Task.find_id(project_id, name) is None:
                 task = m.Task(project_id=project_id, name=name)
                 session.add(task)
+                session.flush()
                 return task.id
 
         return False, 0, f'Failed to create the task {name!r}.'
@@ -415,15 +614,17 @@ class MainForm(ttk.Frame):
     # region Events
     @command(BT_ADD_TASK)
     def clicked_add_task(self) -> None:
-        with get_db().session():
-            project_id = self._cur_project.id
-
+        project_id = self._cur_project_id
         task_name = self._variables[self.TASK].get()
-        result: ServiceResult
-        if result := self.add_task(project_id, task_name):
+        self._controls[self.BT_ADD_TASK].configure({'state': 'disabled'})
+        self.worker.submit(self.add_task, project_id, task_name, callback=self.added_task)
+
+    def added_task(self, result: ServiceResult) -> None:
+        if result:
             self._variables[self.TASK].set('')
-            self.refresh_grid()
+            self.refresh_task(result.record_id)
 
+        self.refresh()
         result.show_message()
 
     @bind('<KeyRelease>', TASK)
@@ -433,23 +634,49 @@ class MainForm(ttk.Frame):
     @bind('<<ComboboxSelected>>', PROJECT)
     def selected_project(self, event: tk.Event) -> None:
         self.select_project(self._variables[self.PROJECT].get())
-        self.refresh_grid()
+
+    @bind('<KeyRelease>', PROJECT)
+    def key_released_project(self, event: tk.Event) -> None:
+        """Search the projects once the typing pauses."""
+        if event.keysym in NAVIGATION_KEYS:
+            return
+
+        if self._project_search is not None:
+            self.after_cancel(self._project_search)
+        self._project_search = self.after(SEARCH_DELAY, self.refresh_projects)
+
+    @bind('<Return>', PROJECT)
+    def entered_project(self, event: tk.Event) -> None:
+        """Select the typed project, or the only one starting with the typed text."""
+        text = self._variables[self.PROJECT].get()
+        matches = [name for name in self._project_names if m.nocase(name) == m.nocase(text)]
+        if not matches and len(self._project_names) == 1 and self._project_prefix == text:
+            matches = self._project_names
+
+        self.select_project(matches[0] if matches else text)
+
+    @menu(MN_REPORT, 'Project x Date')
+    def clicked_report_project_by_date(self) -> None:
+        from .report_form import ReportForm
+
+        ReportForm(self, reports.Kind.PROJECT_BY_DATE, worker=self.worker)
+
+    @menu(MN_REPORT, 'Date x Project')
+    def clicked_report_date_by_project(self) -> None:
+        from .report_form import ReportForm
+
+        ReportForm(self, reports.Kind.DATE_BY_PROJECT, worker=self.worker)
 
     @menu(MN_PROJECT, 'New project')
     def clicked_new_project(self) -> None:
         if (project_name := simpledialog.askstring('New project', 'New project name:')) is not None:
             if project_name != '':
-                result: ServiceResult
-                if result := self.create_project(project_name):
-                    self.select_project(project_name)
-                    self.refresh_all()
-
-                result.show_message()
+                self.worker.submit(self.create_project, project_name,
+                                   callback=lambda result: self.changed_project(result, project_name))
 
     @menu(MN_PROJECT, 'Edit project')
     def clicked_edit_project(self) -> None:
-        with get_db().session():
-            cur_project_name = self._cur_project.name
+        cur_project_name = self._cur_project_name
 
         if (project_name := simpledialog.askstring(
                 'Edit project',
@@ -458,24 +685,31 @@ class MainForm(ttk.Frame):
         )) is not None:
 
             if project_name != cur_project_name:
-                result: ServiceResult
-                if result := self.edit_project(cur_project_name, project_name):
-                    self.select_project(project_name)
-                    self.refresh_all()
-
-                result.show_message()
+                self.worker.submit(self.edit_project, cur_project_name, project_name,
+                                   callback=lambda result: self.changed_project(result, project_name,
+                                                                                cur_project_name))
 
     @menu(MN_PROJECT, 'Delete project')
     def clicked_delete_project(self) -> None:
-        with get_db().session():
-            cur_project_name = self._cur_project.name
+        cur_project_name = self._cur_project_name
 
         if messagebox.askyesno('Delete project',
                                f'Are you sure you want to delete the project {cur_project_name!r}'):
-            result: ServiceResult
-            if result := self.delete_project(cur_project_name):
-                self.select_project('')
-                self.refresh_all()
+            self.worker.submit(self.delete_project, cur_project_name,
+                               callback=lambda result: self.changed_project(result, '', cur_project_name))
+
+    def changed_project(self, result: ServiceResult, select_name: str, old_name: str = None) -> None:
+        """Called on the Tk thread, with the result of a project service run by the worker."""
+        if result:
+            self.update_project_names(old_name, select_name)
+            self.select_project(select_name)
+
+        result.show_message()
 
-            result.show_message()
+    def destroyed(self, event: tk.Event) -> None:
+        if event.widget is self:
+            if self._project_search is not None:
+                self.after_cancel(self._project_search)
+            self.worker.shutdown()  # Lets a timer being started save its entry first
+            self._timers.close_all()
     # endregion
@@ -0,0 +1,189 @@
+import typing as _
+import itertools
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import date, timedelta
+
+import metrics
+import reports
+import utils
+from .modifiers import with_modifiers, command, bind
+from .worker import Worker
+
+ROWS_PER_CHUNK = 200
+
+
+@with_modifiers
+class ReportForm(tk.Toplevel):
+    FR_TOP = 'FR_TOP'
+    FR_BOTTOM = 'FR_BOTTOM'
+    START = 'START'
+    STOP = 'STOP'
+    GRANULARITY = 'GRANULARITY'
+    BT_RUN = 'BT_RUN'
+    TREE = 'TREE'
+    SC_VERTICAL = 'SC_VERTICAL'
+    SC_HORIZONTAL = 'SC_HORIZONTAL'
+
+    def __init__(self, root: tk.Tk | ttk.Frame, kind: reports.Kind, worker: Worker = None, **kwargs) -> None:
+        super().__init__(root, **kwargs)
+
+        self.root = root
+        self.kind = kind
+        self.worker = worker or Worker(self)
+
+        self._controls: dict[str, ttk.Widget] = {}
+        self._variables: dict[str, tk.Variable] = {}
+        self._rows: _.Iterator[reports.PivotRow] | None = None
+        self._fill_id = None
+        self._report_request = 0  # Only the last requested report is shown
+
+        self.build()
+        self.init_position()
+        self.refresh_values()
+        self.refresh_report()
+
+    # region Build
+    def build(self) -> None:
+        self.title(f'Report: {self.kind!s}')
+
+        self._controls[self.FR_TOP] = top = ttk.Frame(self)
+        self._controls[self.FR_BOTTOM] = bottom = ttk.Frame(self)
+
+        defaults = {'width': 10}
+        self._variables[self.START] = start = tk.StringVar()
+        self._controls[self.START] = ttk.Entry(top, textvariable=start, **defaults)
+
+        self._variables[self.STOP] = stop = tk.StringVar()
+        self._controls[self.STOP] = ttk.Entry(top, textvariable=stop, **defaults)
+
+        self._variables[self.GRANULARITY] = granularity = tk.StringVar()
+        self._controls[self.GRANULARITY] = ttk.Combobox(top, textvariable=granularity, state='readonly',
+                                                        values=[str(g) for g in reports.Granularity],
+                                                        **defaults)
+
+        self._controls[self.BT_RUN] = ttk.Button(top, text='Run')
+
+        self._controls[self.TREE] = tree = ttk.Treeview(bottom, show='headings')
+        self._controls[self.SC_VERTICAL] = vertical = ttk.Scrollbar(bottom, orient=tk.VERTICAL,
+                                                                    command=tree.yview)
+        self._controls[self.SC_HORIZONTAL] = horizontal = ttk.Scrollbar(bottom, orient=tk.HORIZONTAL,
+                                                                        command=tree.xview)
+        tree.configure(yscrollcommand=vertical.set, xscrollcommand=horizontal.set)
+
+    def init_position(self) -> None:
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self._controls[self.FR_TOP].grid(row=0, column=0, sticky=tk.EW)
+        self._controls[self.FR_BOTTOM].grid(row=1, column=0, sticky=tk.NSEW)
+        self._controls[self.FR_BOTTOM].grid_columnconfigure(0, weight=1)
+        self._controls[self.FR_BOTTOM].grid_rowconfigure(0, weight=1)
+
+        defaults = {'pady': 5, 'padx': 5, 'sticky': tk.EW}
+        self._controls[self.START].grid(row=0, column=0, **defaults)
+        self._controls[self.STOP].grid(row=0, column=1, **defaults)
+        self._controls[self.GRANULARITY].grid(row=0, column=2, **defaults)
+        self._controls[self.BT_RUN].grid(row=0, column=3, **defaults)
+
+        self._controls[self.TREE].grid(row=0, column=0, sticky=tk.NSEW)
+        self._controls[self.SC_VERTICAL].grid(row=0, column=1, sticky=tk.NS)
+        self._controls[self.SC_HORIZONTAL].grid(row=1, column=0, sticky=tk.EW)
+
+    def refresh_values(self) -> None:
+        today = date.today()
+        self._variables[self.START].set(today.replace(day=1).strftime('%d-%m-%Y'))
+        self._variables[self.STOP].set(today.strftime('%d-%m-%Y'))
+        self._variables[self.GRANULARITY].set(str(reports.Granularity.DAY))
+
+    def refresh_report(self) -> None:
+        """Build the report in the worker, it is shown when it arrives."""
+        try:
+            start = utils.parse_date(self._variables[self.START].get())
+            stop = utils.parse_date(self._variables[self.STOP].get())
+        except ValueError as ex:
+            messagebox.showerror('Invalid date', f'{ex}\n\nUse day-month-year, e.g. 31-12-2023.', parent=self)
+            return
+        if stop < start:
+            messagebox.showerror('Invalid dates', 'The stop date is before the start date.', parent=self)
+            return
+
+        stop += timedelta(days=1)
+        granularity = reports.Granularity(self._variables[self.GRANULARITY].get())
+
+        self._report_request += 1
+        request = self._report_request
+        self.worker.submit(self.load_report, self.kind, start, stop, granularity,
+                           callback=lambda report: self.populated_report(request, report))
+
+    @staticmethod
+    @metrics.timed()
+    def load_report(kind: reports.Kind, start: date, stop: date, granularity: reports.Granularity) -> reports.Report:
+        """
+        Runs in the worker, with the rows: SQLite groups and sorts them all before
+        returning the first one, so reading them is most of the work.
+        """
+        report = reports.build(kind, start, stop, granularity)
+        return report._replace(rows=list(report.rows))
+
+    def populated_report(self, request: int, report: reports.Report) -> None:
+        """Show the columns and the rows in chunks, so the window stays responsive."""
+        if not self.winfo_exists():  # Closed while the worker ran
+            return
+        if request != self._report_request:
+            metrics.count('gui.report_form.stale_loads')
+            return
+
+        self.cancel_fill()
+
+        tree: ttk.Treeview = self._controls[self.TREE]
+        tree.delete(*tree.get_children())
+
+        columns = ['label', *[f'c{idx}' for idx in range(len(report.columns))], 'total']
+        tree.configure(columns=columns)
+        tree.heading('label', text='')
+        tree.column('label', width=150, stretch=False)
+        for column, text in zip(columns[1:], [*report.columns, 'Total']):
+            tree.heading(column, text=text)
+            tree.column(column, width=80, anchor=tk.E, stretch=False)
+
+        self._rows = iter(report.rows)
+        self.fill_chunk()
+
+    def fill_chunk(self) -> None:
+        tree: ttk.Treeview = self._controls[self.TREE]
+
+        count = 0
+        for row in itertools.islice(self._rows, ROWS_PER_CHUNK):
+            values = [utils.format_seconds(v) if v else '' for v in row.values]
+            tree.insert('', tk.END, values=[row.label, *values, utils.format_seconds(row.total)])
+            count += 1
+
+        self._fill_id = self.after(1, self.fill_chunk) if count == ROWS_PER_CHUNK else None
+
+    def cancel_fill(self) -> None:
+        if self._fill_id is not None:
+            self.after_cancel(self._fill_id)
+            self._fill_id = None
+
+        if close := getattr(self._rows, 'close', None):
+            close()
+        self._rows = None
+    # endregion
+
+    # region Events
+    @command(BT_RUN)
+    def clicked_run(self) -> None:
+        self.refresh_report()
+
+    @bind('<FocusOut>', START)
+    @bind('<FocusOut>', STOP)
+    def focus_out_date(self, event: tk.Event) -> None:
+        value: tk.Variable = self._variables[self.START if event.widget is self._controls[self.START] else self.STOP]
+        if formatted := utils.dateformat(value.get()):
+            value.set(formatted)
+
+    @bind('<Destroy>', TREE)
+    def destroyed(self, event: tk.Event) -> None:
+        self.cancel_fill()
+    # endregion
@@ -0,0 +1,39 @@
+"""
+The ttk styles of the application, configured once per Tcl interpreter.
+
+The rows ask for their style when they are built (`use_style`). The first call
+configures it, the next ones only check a Tcl variable, so building many rows
+does not call `ttk::style map` again for each of them.
+"""
+import typing as _
+import tkinter as tk
+from tkinter import ttk
+
+StyleOptions = dict[str, dict[str, _.Any]]
+
+STYLES: dict[str, StyleOptions] = {
+    'TaskFrame.TButton': {
+        'map': {'foreground': [('disabled', 'DarkGrey')]},
+    },
+    'EntryRow.TButton': {
+        'map': {'foreground': [('disabled', 'DarkGrey')]},
+    },
+}
+
+# Tcl array of the styles already configured, it lives and dies with its interpreter.
+REGISTERED = '::timetracker_styles'
+
+
+def use_style(widget: tk.Misc, name: str) -> str:
+    """Configure the style `name` in the interpreter of `widget` if needed, returns its name."""
+    key = f'{REGISTERED}({name})'
+    if not widget.tk.getboolean(widget.tk.call('info', 'exists', key)):
+        style = ttk.Style(widget)
+        options = STYLES[name]
+        if configure := options.get('configure'):
+            style.configure(name, **configure)
+        if mapping := options.get('map'):
+            style.map(name, **mapping)
+        widget.tk.call('set', key, 1)
+
+    return name
@@ -0,0 +1,60 @@
+import typing as _
+import tkinter as tk
+from datetime import datetime
+
+import metrics
+
+
+class Tickable(_.Protocol):
+    def tick(self, now: datetime) -> None:
+        ...
+
+
+class Ticker:
+    """
+    A single `after` loop shared by all the running timers.
+
+    Every subscriber is updated in the same callback with the same `now`, so the
+    timers never drift apart. The loop is aligned to the wall-clock second and
+    stops when there is nobody to tick.
+    """
+
+    def __init__(self, widget: tk.Misc, interval: int = 1000) -> None:
+        self.widget = widget
+        self.interval = interval
+
+        self._subscribers: dict[int, Tickable] = {}
+        self._after_id = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def add(self, subscriber: Tickable) -> None:
+        self._subscribers[id(subscriber)] = subscriber
+        subscriber.tick(datetime.now())
+        self.schedule()
+
+    def remove(self, subscriber: Tickable) -> None:
+        self._subscribers.pop(id(subscriber), None)
+        if not self._subscribers:
+            self.cancel()
+
+    def schedule(self) -> None:
+        if self._after_id is None and self._subscribers:
+            delay = self.interval - (datetime.now().microsecond // 1000) % self.interval
+            self._after_id = self.widget.after(delay, self.tick)
+
+    def cancel(self) -> None:
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    @metrics.timed()
+    def tick(self) -> None:
+        self._after_id = None
+
+        now = datetime.now()
+        for subscriber in list(self._subscribers.values()):
+            subscriber.tick(now)
+
+        self.schedule()
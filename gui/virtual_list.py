@@ -0,0 +1,196 @@
+import typing as _
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualRow(_.Protocol):
+    model: _.Any
+
+    def set_model(self, model: _.Any) -> None:
+        ...
+
+
+RowFactory = _.Callable[[tk.Misc], VirtualRow]
+KeyFunc = _.Callable[[_.Any], _.Hashable]
+OrderFunc = _.Callable[[_.Any], _.Any]
+
+ADD_TAG = '{tag widgets} {foreach w $widgets {bindtags $w [linsert [bindtags $w] 0 $tag]}}'
+
+
+class VirtualList(ttk.Frame):
+    """
+    A scrollable list that only has widgets for the visible rows.
+
+    The rows are created by `row_factory` and, while scrolling, they are bound to
+    other items through `set_model`. The number of widgets depends on the height
+    of the list, not on the number of items.
+
+    Items are identified by `key` and kept sorted by `order`, so single items can be
+    added, replaced or removed without touching the other rows.
+    """
+
+    def __init__(self, root: tk.Misc, row_factory: RowFactory, key: KeyFunc = None, order: OrderFunc = None,
+                 visible_rows: int = 15, **kwargs) -> None:
+        super().__init__(root, **kwargs)
+
+        self.row_factory = row_factory
+        self.key = key or (lambda item: item)
+        self.order = order
+        self.items: list[_.Any] = []
+        self.rows: list[VirtualRow] = []
+        self.first = 0
+
+        self._pool: list[VirtualRow] = []
+        self._hidden: set[int] = set()
+
+        self._row_height = 1
+        self._tag = f'VirtualList{id(self)}'
+
+        self._body = ttk.Frame(self)
+        self._scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self._body.grid_columnconfigure(0, weight=1)
+        self._body.grid(row=0, column=0, sticky=tk.NSEW)
+        self._scrollbar.grid(row=0, column=1, sticky=tk.NS)
+
+        self.bind('<Configure>', self.resized)
+        self.bind_class(self._tag, '<MouseWheel>', self.wheel)
+        self.bind_class(self._tag, '<Button-4>', self.wheel)
+        self.bind_class(self._tag, '<Button-5>', self.wheel)
+
+        self.resize_rows(visible_rows)
+
+    # region Rows
+    def resize_rows(self, count: int) -> None:
+        count = max(count, 1)
+
+        while len(self.rows) < count:
+            if self._pool:
+                row = self._pool.pop()
+            else:
+                row = self.row_factory(self._body)
+                self.add_tag(row)
+
+            row.grid(row=len(self.rows), column=0, sticky=tk.EW)
+            self._hidden.discard(id(row))
+            self.rows.append(row)
+
+            if len(self.rows) == 1:
+                row.update_idletasks()
+                self._row_height = max(row.winfo_reqheight(), 1)
+
+        while len(self.rows) > count:
+            row = self.rows.pop()
+            row.set_model(None)
+            row.grid_forget()
+            self._pool.append(row)
+
+        # Keep the space of the hidden rows, otherwise the window shrinks and the list with it.
+        self.grid_rowconfigure(0, minsize=count * self._row_height)
+        self.render()
+
+    def add_tag(self, widget: tk.Misc) -> None:
+        """Put the tag of the list first in the bindings of the widget and its descendants, in one Tcl call."""
+        widgets, stack = [], [widget]
+        while stack:
+            widgets.append((cur := stack.pop())._w)
+            stack.extend(cur.children.values())
+
+        self.tk.call('apply', ADD_TAG, self._tag, widgets)
+
+    def render(self) -> None:
+        self.first = max(min(self.first, len(self.items) - len(self.rows)), 0)
+
+        for idx, row in enumerate(self.rows, start=self.first):
+            visible = idx < len(self.items)
+            row.set_model(self.items[idx] if visible else None)
+
+            if visible and id(row) in self._hidden:
+                self._hidden.discard(id(row))
+                row.grid()
+            elif not visible and id(row) not in self._hidden:
+                self._hidden.add(id(row))
+                row.grid_remove()
+
+        if self.items:
+            self._scrollbar.set(self.first / len(self.items),
+                                min((self.first + len(self.rows)) / len(self.items), 1.0))
+        else:
+            self._scrollbar.set(0.0, 1.0)
+
+    def visible_rows(self) -> list[VirtualRow]:
+        return [row for row in self.rows if row.model is not None]
+    # endregion
+
+    # region Items
+    def index_of(self, key: _.Hashable) -> int | None:
+        for idx, item in enumerate(self.items):
+            if self.key(item) == key:
+                return idx
+        return None
+
+    def set_items(self, items: _.Iterable[_.Any]) -> None:
+        """Replace the items, keeping the first visible item in place when it is still there."""
+        anchor = self.key(self.items[self.first]) if self.first < len(self.items) else None
+
+        self.items = list(items)
+        if anchor is not None and (idx := self.index_of(anchor)) is not None:
+            self.first = idx
+        else:
+            self.first = 0  # Other items (e.g. another project), back to the top
+
+        self.render()
+
+    def replace(self, item: _.Any) -> None:
+        if (idx := self.index_of(self.key(item))) is not None:
+            self.items[idx] = item
+
+    def upsert(self, item: _.Any) -> None:
+        """Add or replace a single item, at its sorted position."""
+        if (idx := self.index_of(self.key(item))) is not None:
+            del self.items[idx]
+
+        if self.order is None:
+            self.items.append(item)
+        else:
+            position = bisect.bisect(self.items, self.order(item), key=self.order)
+            self.items.insert(position, item)
+
+        self.render()
+
+    def remove(self, key: _.Hashable) -> None:
+        if (idx := self.index_of(key)) is not None:
+            del self.items[idx]
+            if idx < self.first:
+                self.first -= 1
+            self.render()
+    # endregion
+
+    # region Events
+    def yview(self, *args: str) -> None:
+        if not self.items:
+            return
+
+        if args[0] == tk.MOVETO:
+            self.first = int(float(args[1]) * len(self.items))
+        elif args[0] == tk.SCROLL:
+            step = len(self.rows) if args[2] == tk.PAGES else 1
+            self.first += int(args[1]) * step
+
+        self.render()
+
+    def wheel(self, event: tk.Event) -> None:
+        if event.num == 4 or event.delta > 0:
+            self.yview(tk.SCROLL, -1, tk.UNITS)
+        elif event.num == 5 or event.delta < 0:
+            self.yview(tk.SCROLL, 1, tk.UNITS)
+
+    def resized(self, event: tk.Event) -> None:
+        if event.widget is self:
+            count = event.height // self._row_height
+            if count != len(self.rows):
+                self.resize_rows(count)
+    # endregion
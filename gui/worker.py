@@ -0,0 +1,90 @@
+import typing as _
+import queue
+import sys
+import tkinter as tk
+from tkinter import messagebox
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from db import get_db
+
+Callback = _.Callable[[_.Any], None]
+Errback = _.Callable[[BaseException], None]
+
+
+class Worker:
+    """
+    Run database work on background threads, away from the Tk main loop.
+
+    The functions run on a thread pool (each thread gets its own session from
+    `db.Database`), their results are put on a queue and the callbacks are called
+    on the Tk thread, from a poll scheduled with `after()` while there is pending work.
+    Functions decorated with `on_error` already turn exceptions into a `ServiceResult`,
+    anything else that raises goes to `errback`. A callback that raises is reported
+    like any Tk callback (`report_callback_exception`), the next results still come.
+    """
+
+    def __init__(self, widget: tk.Misc, max_workers: int = 2, interval: int = 20) -> None:
+        self.widget = widget
+        self.interval = interval
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db-worker')
+        self._results: queue.SimpleQueue[tuple[Future, Callback | None, Errback | None]] = queue.SimpleQueue()
+        self._pending = 0
+        self._after_id = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, func: _.Callable, *args: _.Any,
+               callback: Callback = None, errback: Errback = None, **kwargs: _.Any) -> Future:
+        self._pending += 1
+        future = self._executor.submit(self.run, func, *args, **kwargs)
+        future.add_done_callback(lambda done: self._results.put((done, callback, errback)))
+        self.schedule()
+        return future
+
+    @staticmethod
+    def run(func: _.Callable, *args: _.Any, **kwargs: _.Any) -> _.Any:
+        """On the worker thread, a job is one action of the SQL profiler."""
+        with get_db().profiled(getattr(func, '__qualname__', repr(func))):
+            return func(*args, **kwargs)
+
+    def schedule(self) -> None:
+        if self._after_id is None and self._pending:
+            self._after_id = self.widget.after(self.interval, self.poll)
+
+    def poll(self) -> None:
+        self._after_id = None
+
+        try:
+            while True:
+                try:
+                    future, callback, errback = self._results.get_nowait()
+                except queue.Empty:
+                    break
+
+                self._pending -= 1
+                if not future.cancelled():
+                    self.deliver(future, callback, errback)
+        finally:
+            self.schedule()
+
+    def deliver(self, future: Future, callback: Callback | None, errback: Errback | None) -> None:
+        try:
+            if (ex := future.exception()) is not None:
+                (errback or self.show_error)(ex)
+            elif callback is not None:
+                callback(future.result())
+        except Exception:
+            self.widget._root().report_callback_exception(*sys.exc_info())
+
+    @staticmethod
+    def show_error(ex: BaseException) -> None:
+        messagebox.showerror(message=f'Background task failed\n\n{ex}')
+
+    def shutdown(self) -> None:
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._executor.shutdown(wait=True, cancel_futures=True)
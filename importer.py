@@ -0,0 +1,241 @@
+"""
+Bulk import of time entries from CSV or JSON lines files.
+
+Every row is one entry, with the fields `project`, `task`, `start_date`, `start_time`,
+`stop_date` and `stop_time`. The dates and times take the same formats as the
+entries of the task information form (see `utils.dateformat`/`utils.timeformat`),
+e.g. `3-2-2021` and `9.30`. Without `stop_date` the entry stops on its start day,
+or on the next one when the stop time is before the start time.
+
+Projects and tasks are found by name, or created, through an in-memory cache. The
+entries are inserted in batches of `batch_size` rows, with their daily rollup, and
+committed every `commit_size` rows, so memory stays flat whatever the file size.
+"""
+import typing as _
+import csv
+import json
+import time as _time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import sqlalchemy as sa
+
+import models as m
+import utils
+from db import get_db
+
+FIELDS = ('project', 'task', 'start_date', 'start_time', 'stop_date', 'stop_time')
+BATCH_SIZE = 10_000
+COMMIT_SIZE = 200_000
+MAX_ERRORS = 20  # Messages kept, the skipped rows are all counted
+
+Row = dict[str, _.Any]
+ProgressFunc = _.Callable[['ImportResult'], None]
+
+
+class ImportResult:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.entries = 0
+        self.projects = 0
+        self.tasks = 0
+        self.skipped = 0
+        self.errors: list[str] = []
+        self.started = _time.perf_counter()
+        self.seconds = 0.0
+
+    def __repr__(self) -> str:
+        return (f'ImportResult(rows: {self.rows!r}, '
+                f'entries: {self.entries!r}, '
+                f'projects: {self.projects!r}, '
+                f'tasks: {self.tasks!r}, '
+                f'skipped: {self.skipped!r}, '
+                f'seconds: {self.seconds:.3f})')
+
+    def __str__(self) -> str:
+        return (f'{self.entries} entries ({self.projects} new projects, {self.tasks} new tasks, '
+                f'{self.skipped} rows skipped) in {self.seconds:.1f}s, {self.rate:,.0f} rows/s')
+
+    @property
+    def rate(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def tick(self) -> None:
+        self.seconds = _time.perf_counter() - self.started
+
+    def skip(self, line: int, ex: Exception) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f'row {line}: {ex}')
+
+
+# region Parsing
+# The same dates and times come back on many rows.
+parse_date = lru_cache(maxsize=4096)(utils.parse_date)
+parse_time = lru_cache(maxsize=4096)(utils.parse_time)
+
+
+def parse_range(row: Row) -> tuple[datetime, datetime]:
+    # JSON lines may hold numbers (e.g. `"start_time": 9`), the parsers take text.
+    start_date = str(row['start_date'])
+    stop_date = str(row['stop_date']) if row.get('stop_date') else start_date
+    start = datetime.combine(parse_date(start_date), parse_time(str(row['start_time'])))
+    stop = datetime.combine(parse_date(stop_date), parse_time(str(row['stop_time'])))
+
+    if stop < start and not row.get('stop_date'):
+        stop += timedelta(days=1)
+    if stop < start:
+        raise ValueError(f'stop {stop} is before start {start}')
+
+    return start, stop
+
+
+def parse_name(row: Row, key: str) -> str:
+    """A project or task name, the GUI forbids the empty ones (an empty CSV cell, or `null` in JSON)."""
+    if not isinstance(name := row[key], str) or not name.strip():
+        raise ValueError(f'{key} must be a non-empty name, not {name!r}')
+    return name
+
+
+def read_csv(path: Path) -> _.Generator[Row, None, None]:
+    with path.open(newline='', encoding='utf-8') as file:
+        yield from csv.DictReader(file)
+
+
+def read_jsonl(path: Path) -> _.Generator[Row, None, None]:
+    with path.open(encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_file(path: str | Path) -> _.Generator[Row, None, None]:
+    """Read the rows of a .csv file, or of a JSON lines file (any other suffix)."""
+    path = Path(path)
+    return read_csv(path) if path.suffix.lower() == '.csv' else read_jsonl(path)
+# endregion
+
+
+class NameCache:
+    """Ids of the projects and tasks by name, found or created on the first miss."""
+
+    def __init__(self, connection: sa.Connection, result: ImportResult) -> None:
+        self.connection = connection
+        self.result = result
+        self.projects: dict[str, int] = {}
+        self.tasks: dict[tuple[int, str], int] = {}
+
+    def project_id(self, name: str) -> int:
+        if (project_id := self.projects.get(name)) is None:
+            table = m.Project.__table__
+            cmd = sa.select(table.c.id).where(table.c.name == name, table.c.state != m.State.DELETED).limit(1)
+            if (project_id := self.connection.execute(cmd).scalar()) is None:
+                project_id = self.insert(table, name=name)
+                self.result.projects += 1
+            self.projects[name] = project_id
+
+        return project_id
+
+    def task_id(self, project_name: str, name: str) -> int:
+        project_id = self.project_id(project_name)
+        if (task_id := self.tasks.get((project_id, name))) is None:
+            table = m.Task.__table__
+            cmd = (sa.select(table.c.id)
+                   .where(table.c.project_id == project_id,
+                          table.c.name == name,
+                          table.c.state != m.State.DELETED)
+                   .limit(1))
+            if (task_id := self.connection.execute(cmd).scalar()) is None:
+                task_id = self.insert(table, project_id=project_id, name=name)
+                self.result.tasks += 1
+            self.tasks[(project_id, name)] = task_id
+
+        return task_id
+
+    def insert(self, table: sa.Table, **values: _.Any) -> int:
+        return self.connection.execute(sa.insert(table).values(**values)).inserted_primary_key[0]
+
+
+ENTRY_COLUMNS = ('task_id', 'start', 'stop', 'manual', 'running', 'day', 'days', 'created_at', 'updated_at')
+INSERT_ENTRY = (f'INSERT INTO task_entry ({", ".join(ENTRY_COLUMNS)}) '
+                f'VALUES ({", ".join("?" * len(ENTRY_COLUMNS))})')
+
+
+def sql_datetime(value: datetime) -> str:
+    """The text the SQLAlchemy `DateTime` type stores in SQLite, without its (slow) bind processing."""
+    return value.isoformat(' ', 'microseconds')
+
+
+def insert_entries(connection: sa.Connection, entries: list[Row]) -> None:
+    """Insert a batch of entries and add them to the daily rollup, the mapper events do not run for it."""
+    deltas = defaultdict(float)
+    for entry in entries:
+        m.add_day_deltas(deltas, entry['task_id'], entry['start'], entry['stop'])
+
+    now = sql_datetime(datetime.now())
+    connection.exec_driver_sql(INSERT_ENTRY, [
+        (entry['task_id'], sql_datetime(entry['start']), sql_datetime(entry['stop']),
+         int(entry['manual']), int(entry['running']), entry['day'].isoformat(), entry['days'], now, now)
+        for entry in entries
+    ])
+    m.apply_day_deltas(connection, deltas)
+
+
+def import_rows(rows: _.Iterable[Row], batch_size: int = BATCH_SIZE, commit_size: int = COMMIT_SIZE,
+                progress: ProgressFunc = None) -> ImportResult:
+    """
+    Import the rows, skipping the invalid ones. Each `commit_size` rows are committed,
+    so a failure only loses the rows since the last commit.
+    """
+    result = ImportResult()
+    batch: list[Row] = []
+    uncommitted = 0
+
+    with get_db().engine.connect() as connection:
+        cache = NameCache(connection, result)
+
+        for line, row in enumerate(rows, start=1):
+            result.rows += 1
+            try:
+                start, stop = parse_range(row)
+                batch.append({
+                    'task_id': cache.task_id(parse_name(row, 'project'), parse_name(row, 'task')),
+                    'start': start,
+                    'stop': stop,
+                    'manual': True,
+                    'running': False,
+                    **m.day_buckets(start, stop),
+                })
+            except (KeyError, TypeError, ValueError) as ex:
+                result.skip(line, ex)
+                continue
+
+            if len(batch) >= batch_size:
+                insert_entries(connection, batch)
+                result.entries += len(batch)
+                uncommitted += len(batch)
+                batch.clear()
+
+                if uncommitted >= commit_size:
+                    connection.commit()
+                    m.touch_data()
+                    uncommitted = 0
+
+                result.tick()
+                if progress is not None:
+                    progress(result)
+
+        if batch:
+            insert_entries(connection, batch)
+            result.entries += len(batch)
+        connection.commit()
+        m.touch_data()
+
+    result.tick()
+    return result
+
+
+def import_file(path: str | Path, **kwargs: _.Any) -> ImportResult:
+    return import_rows(read_file(path), **kwargs)
@@ -1,26 +1,150 @@
+"""
+Entry point of the GUI, and of the maintenance options that exit without it.
+
+The heavy modules (SQLAlchemy and the models, tkinter and the forms) are imported
+where they are first needed: the window shows up before the database is loaded,
+and the options that exit early never import tkinter. `benchmarks/startup.py`
+measures it.
+"""
+import argparse
+import atexit
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
-import models
-import db
-from gui.main_form import MainForm
-from gui import build_root
+
+import utils
 
 root = Path(__file__).parent.expanduser().absolute()
 db_file = root / 'data.sqlite'
 
 
-def main():
-    print('Start')
-    create_all = not db_file.exists()
-    db.init_db(f'sqlite:///{db_file!s}', echo=False)
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Simple time tracker with GUI')
+    parser.add_argument('--db', type=Path, default=db_file, help='database file (default: %(default)s)')
+    parser.add_argument('--rebuild-rollup', action='store_true',
+                        help='recompute the daily totals from all the entries and exit')
+    parser.add_argument('--import', dest='import_files', nargs='+', metavar='FILE',
+                        help='import the entries of CSV or JSON lines files and exit')
+    parser.add_argument('--export', metavar='FILE',
+                        help='export the entries to a .csv file, or to a columnar file (any other suffix), and exit')
+    parser.add_argument('--project', action='append', help='export only this project (repeatable)')
+    parser.add_argument('--state', action='append', choices=('new', 'in-progress', 'concluded', 'deleted'),
+                        help='export only the tasks in this state (repeatable)')
+    parser.add_argument('--from', dest='date_from', type=utils.parse_date, metavar='DATE',
+                        help='export the entries from this day')
+    parser.add_argument('--to', dest='date_to', type=utils.parse_date, metavar='DATE',
+                        help='export the entries up to this day, included')
+    parser.add_argument('--session-policy', choices=('unit-of-work', 'long-lived'), default='long-lived',
+                        help='how long the database sessions live (default: %(default)s)')
+    parser.add_argument('--profile', choices=('fast', 'durable'), default='durable',
+                        help='SQLite settings, "fast" can lose the last commits on a power loss '
+                             '(default: %(default)s)')
+    parser.add_argument('--checkpoint-interval', type=int, metavar='SECONDS',
+                        help='how often the running timers are saved (default: every minute)')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='append timings and counters to FILE as JSON lines, or print a summary with "-"')
+    parser.add_argument('--metrics-interval', type=float, default=60, metavar='SECONDS',
+                        help='how often the metrics are reported (default: %(default)s)')
+    parser.add_argument('--count-queries', type=int, nargs='?', const=10, metavar='N',
+                        help='warn when a statement runs more than N times (default: 10) in one action, '
+                             'and print the slowest statements on exit')
+    parser.add_argument('--startup-probe', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def probe(event: str, started: float) -> None:
+    """Report a startup milestone to `benchmarks/startup.py`."""
+    print(f'startup-probe {event} {time.perf_counter() - started:.6f}', flush=True)
+
+
+def init_db(args: argparse.Namespace) -> None:
+    import db
+    import migrations
+    import models
+
+    create_all = not args.db.exists()
+    db.init_db(f'sqlite:///{args.db!s}', policy=db.SessionPolicy(args.session_policy),
+               profile=db.PROFILES[args.profile], echo=False)
 
     if create_all:
         print('Create all models')
         models.create_all()
+        migrations.stamp()
+    elif applied := migrations.migrate():
+        print(f'Migrated: {", ".join(applied)}')
+
+    if args.count_queries is not None:
+        profiler = db.get_db().enable_profiler(repeat_threshold=args.count_queries)
+        atexit.register(lambda: print(profiler.total.summary(limit=20)))
+
+
+def run_batch(args: argparse.Namespace) -> None:
+    if args.import_files:
+        import importer
+
+        for file in args.import_files:
+            print(f'Import {file}')
+            result = importer.import_file(file, progress=lambda r: print(f'  {r.rows} rows, {r.rate:,.0f} rows/s'))
+            print(f'  {result}')
+            for error in result.errors:
+                print(f'  {error}')
+
+    elif args.export:
+        import exporter
+        import models
+
+        export = exporter.export_csv if Path(args.export).suffix.lower() == '.csv' else exporter.export_columnar
+        count = export(args.export, projects=args.project,
+                       states=args.state and [models.State(state) for state in args.state],
+                       start=args.date_from and datetime.combine(args.date_from, datetime.min.time()),
+                       stop=args.date_to and datetime.combine(args.date_to + timedelta(days=1), datetime.min.time()))
+        print(f'Exported {count} entries to {args.export}')
+
+    elif args.rebuild_rollup:
+        import models
+
+        print('Rebuild daily rollup')
+        print(f'{models.rebuild_task_days()} rows')
+
+
+def main():
+    started = time.perf_counter()
+    args = parse_args()
+
+    print('Start')
+    if args.metrics:
+        import metrics
+
+        reporter = metrics.Reporter(None if args.metrics == '-' else args.metrics, args.metrics_interval)
+        reporter.start()
+        atexit.register(reporter.stop)
+
+    if args.import_files or args.export or args.rebuild_rollup:
+        init_db(args)
+        run_batch(args)
+        return
 
     print('Run form')
-    root = build_root()
-    MainForm(root)
-    root.mainloop()
+    from gui import build_root
+
+    # Show the (empty) window first, the database and the forms load after.
+    window = build_root()
+    window.update()
+    if args.startup_probe:
+        probe('first-window', started)
+
+    init_db(args)
+    from gui.main_form import MainForm
+
+    kwargs = {} if args.checkpoint_interval is None else {'checkpoint_interval': args.checkpoint_interval}
+    MainForm(window, **kwargs)
+    window.update()
+    if args.startup_probe:
+        probe('main-form', started)
+        window.destroy()
+        return
+
+    window.mainloop()
 
     print('End')
 
@@ -0,0 +1,265 @@
+"""
+Timings and counters, cheap enough to stay on.
+
+    import metrics
+
+    @metrics.timed()                       # named after the function, e.g. models.Project.find_all
+    def find_all(): ...
+
+    with metrics.span('gui.load_grid'):    # or as a context manager
+        ...
+
+    metrics.count('gui.stale_loads')
+
+Every span adds its duration to a latency histogram (count, sum, min, max and
+p50/p95/p99); a span that raises also counts `<name>.errors`. The histograms use
+log-linear buckets (16 per power of two, about 6% precision), so recording is a
+few dictionary updates and memory does not grow with the number of calls.
+
+The metrics are collected for the whole process, from any thread. `snapshot()`
+returns them, `write_jsonl` appends them to a file, one JSON line per metric, and
+`summary` formats a table; `Reporter` does either periodically (see `--metrics`
+in main.py).
+"""
+import typing as _
+import inspect
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+SUB_BUCKETS = 16  # Per power of two
+PERCENTILES = (50, 95, 99)
+REPORT_INTERVAL = 60
+
+Func = _.TypeVar('Func', bound=_.Callable)
+
+
+# region Histogram
+def _bucket(micros: int) -> int:
+    if micros < 2 * SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - 5
+    return shift * SUB_BUCKETS + (micros >> shift)
+
+
+def _bucket_value(bucket: int) -> float:
+    """Middle of a bucket, in microseconds."""
+    if bucket < 2 * SUB_BUCKETS:
+        return bucket
+    shift = bucket // SUB_BUCKETS - 1
+    return ((bucket % SUB_BUCKETS + SUB_BUCKETS) << shift) + ((1 << shift) - 1) / 2
+
+
+class Histogram:
+    """Latencies in microseconds. Not thread-safe, `Metrics` holds its lock around it."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self.buckets: dict[int, int] = {}
+
+    def add(self, micros: int) -> None:
+        if self.count == 0 or micros < self.min:
+            self.min = micros
+        if micros > self.max:
+            self.max = micros
+        self.count += 1
+        self.total += micros
+
+        bucket = _bucket(micros)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, percent: float) -> float:
+        rank, seen = self.count * percent / 100, 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(max(_bucket_value(bucket), self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, _.Any]:
+        """Milliseconds."""
+        return {
+            'count': self.count,
+            'sum_ms': self.total / 1000,
+            'min_ms': self.min / 1000,
+            'max_ms': self.max / 1000,
+            **{f'p{percent}_ms': self.percentile(percent) / 1000 for percent in PERCENTILES},
+        }
+# endregion
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.enabled = True
+        self.started = datetime.now()
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            with self._lock:
+                if (histogram := self.histograms.get(name)) is None:
+                    self.histograms[name] = histogram = Histogram()
+                histogram.add(round(seconds * 1_000_000))
+
+    def snapshot(self, reset: bool = False) -> dict[str, _.Any]:
+        with self._lock:
+            result = {
+                'started': self.started.isoformat(timespec='seconds'),
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'counters': dict(self.counters),
+                'histograms': {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+            if reset:
+                self.started = datetime.now()
+                self.counters.clear()
+                self.histograms.clear()
+
+        return result
+
+    def reset(self) -> None:
+        self.snapshot(reset=True)
+
+
+registry = Metrics()
+
+
+class span:
+    """
+    Time a block, or every call of a function, into the histogram `name`.
+
+    As a context manager, use a new instance each time (`with span(name):`).
+    """
+
+    def __init__(self, name: str, metrics: Metrics = None) -> None:
+        self.name = name
+        self.metrics = metrics or registry
+        self._started = 0.0
+
+    def __enter__(self) -> 'span':
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.metrics.observe(self.name, time.perf_counter() - self._started)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.metrics.count(f'{self.name}.errors')
+
+    def __call__(self, func: Func) -> Func:
+        name, metrics = self.name, self.metrics
+
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def _span(*args, **kwargs) -> _.Any:
+                # The time of the whole iteration, not of creating the generator.
+                with span(name, metrics):
+                    return (yield from func(*args, **kwargs))
+        else:
+            @wraps(func)
+            def _span(*args, **kwargs) -> _.Any:
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    metrics.count(f'{name}.errors')
+                    raise
+                finally:
+                    metrics.observe(name, time.perf_counter() - started)
+
+        return _span
+
+
+def timed(name: str = None, metrics: Metrics = None) -> _.Callable[[Func], Func]:
+    """Decorator timing a function, named `<module>.<qualified name>` by default."""
+    def _timed(func: Func) -> Func:
+        return span(name or f'{func.__module__}.{func.__qualname__}', metrics)(func)
+
+    return _timed
+
+
+def count(name: str, value: int = 1) -> None:
+    registry.count(name, value)
+
+
+def snapshot(reset: bool = False) -> dict[str, _.Any]:
+    return registry.snapshot(reset)
+
+
+# region Export
+def jsonl_lines(snapshot: dict[str, _.Any]) -> _.Generator[str, None, None]:
+    """One JSON line per metric."""
+    common = {'started': snapshot['started'], 'time': snapshot['time']}
+    for name, value in sorted(snapshot['counters'].items()):
+        yield json.dumps({**common, 'type': 'counter', 'name': name, 'value': value})
+    for name, values in sorted(snapshot['histograms'].items()):
+        yield json.dumps({**common, 'type': 'histogram', 'name': name, **values})
+
+
+def write_jsonl(path: str | Path, snapshot: dict[str, _.Any]) -> None:
+    with Path(path).open('a', encoding='utf-8') as file:
+        for line in jsonl_lines(snapshot):
+            file.write(line + '\n')
+
+
+def summary(snapshot: dict[str, _.Any]) -> str:
+    """The histograms by total time, then the counters."""
+    lines = [f'Metrics {snapshot["started"]} - {snapshot["time"]}']
+    if histograms := snapshot['histograms']:
+        width = max(map(len, histograms))
+        lines.append(f'{"":{width}}  {"count":>8}  {"total ms":>10}' +
+                     ''.join(f'  {f"p{percent}":>8}' for percent in PERCENTILES) + f'  {"max":>8}')
+        for name, values in sorted(histograms.items(), key=lambda item: item[1]['sum_ms'], reverse=True):
+            lines.append(f'{name:{width}}  {values["count"]:8}  {values["sum_ms"]:10.1f}' +
+                         ''.join(f'  {values[f"p{percent}_ms"]:8.2f}' for percent in PERCENTILES) +
+                         f'  {values["max_ms"]:8.2f}')
+    for name, value in sorted(snapshot['counters'].items()):
+        lines.append(f'{name}: {value}')
+    return '\n'.join(lines)
+
+
+class Reporter(threading.Thread):
+    """
+    Every `interval` seconds, and when stopped, append the metrics of the interval
+    to `path` as JSON lines, or print their summary to stderr without a path.
+    """
+
+    def __init__(self, path: str | Path = None, interval: float = REPORT_INTERVAL, metrics: Metrics = None) -> None:
+        super().__init__(name='metrics-reporter', daemon=True)
+        self.path = path
+        self.interval = interval
+        self.metrics = metrics or registry
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.report()
+
+    def report(self) -> None:
+        snapshot = self.metrics.snapshot(reset=True)
+        if not snapshot['counters'] and not snapshot['histograms']:
+            return
+
+        if self.path is None:
+            print(summary(snapshot), file=sys.stderr, flush=True)
+        else:
+            write_jsonl(self.path, snapshot)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+        self.report()
+# endregion
@@ -0,0 +1,94 @@
+"""
+Schema migrations for existing `data.sqlite` files.
+
+`models.create_all()` only runs when the file is created, so every change to the
+schema after that needs a step here. The version of a database is kept in
+`PRAGMA user_version`, each step runs once and bumps it.
+"""
+import typing as _
+import sqlalchemy as sa
+import models
+from db import get_db
+
+Step = _.Callable[[sa.Connection], None]
+
+
+def create_task_day(connection: sa.Connection) -> None:
+    models.TaskDay.__table__.create(connection, checkfirst=True)
+
+
+def _create_indexes(connection: sa.Connection, *names: str) -> None:
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in names:
+                index.create(connection, checkfirst=True)
+
+
+def create_indexes(connection: sa.Connection) -> None:
+    _create_indexes(connection,
+                    'ix_project_live_name', 'ix_task_live_project_name',
+                    'ix_task_entry_task_start', 'ix_task_day_day')
+
+
+def add_entry_day_buckets(connection: sa.Connection) -> None:
+    connection.exec_driver_sql('ALTER TABLE task_entry ADD COLUMN day DATE')
+    connection.exec_driver_sql('ALTER TABLE task_entry ADD COLUMN days INTEGER')
+    connection.exec_driver_sql('UPDATE task_entry '
+                               'SET day = date(start), '
+                               '    days = max(CAST(julianday(date(stop)) - julianday(date(start)) AS INTEGER), 0)')
+    _create_indexes(connection, 'ix_task_entry_day', 'ix_task_entry_days')
+
+
+def create_page_index(connection: sa.Connection) -> None:
+    _create_indexes(connection, 'ix_task_entry_task_page')
+
+
+def add_entry_running(connection: sa.Connection) -> None:
+    connection.exec_driver_sql('ALTER TABLE task_entry ADD COLUMN running BOOLEAN DEFAULT 0 NOT NULL')
+    _create_indexes(connection, 'ix_task_entry_running')
+
+
+def create_name_prefix_index(connection: sa.Connection) -> None:
+    _create_indexes(connection, 'ix_project_live_name_nocase')
+
+
+STEPS: list[Step] = [
+    create_task_day,
+    create_indexes,
+    add_entry_day_buckets,
+    create_page_index,
+    add_entry_running,
+    create_name_prefix_index,
+]
+
+LATEST = len(STEPS)
+
+
+def get_version(connection: sa.Connection) -> int:
+    return connection.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def set_version(connection: sa.Connection, version: int) -> None:
+    connection.exec_driver_sql(f'PRAGMA user_version = {int(version)}')
+
+
+def stamp() -> None:
+    """Mark a database created by `models.create_all()` as up to date."""
+    with get_db().engine.begin() as connection:
+        set_version(connection, LATEST)
+
+
+def migrate() -> list[str]:
+    """Run the pending steps, returns their names."""
+    applied = []
+    with get_db().engine.begin() as connection:
+        version = get_version(connection)
+        for version, step in enumerate(STEPS[version:], start=version + 1):
+            step(connection)
+            set_version(connection, version)
+            applied.append(step.__name__)
+
+    if create_task_day.__name__ in applied:
+        models.rebuild_task_days()
+
+    return applied
@@ -1,10 +1,23 @@
 import typing as _
-from datetime import datetime, timedelta, time
+import string
+import sys
+import threading
+from collections import defaultdict, OrderedDict
+from datetime import datetime, date, timedelta, time
 from enum import StrEnum
 import sqlalchemy as sa
-from sqlalchemy.orm import DeclarativeBase, mapped_column as column, Mapped, relationship
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import DeclarativeBase, Session, mapped_column as column, Mapped, relationship
+import metrics
 from db import get_db
 
+DayKey = tuple[int, date]
+
+_data_version = 0
+
+# Case folding of SQLite NOCASE (ASCII only), to order and match the names as the index does.
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
 
 def create_all() -> None:
     db = get_db()
@@ -24,6 +37,282 @@ class Base(DeclarativeBase):
     updated_at: Mapped[datetime] = column(default=datetime.now, onupdate=datetime.now)
 
 
+def nocase(name: str) -> str:
+    return name.translate(_NOCASE)
+
+
+def today_range() -> tuple[datetime, datetime]:
+    today_start = datetime.combine(datetime.today(), time(0))
+    return today_start, today_start + timedelta(days=1)
+
+
+def seconds_between(start: _.Any, stop: _.Any) -> sa.ColumnElement:
+    """SQL expression with the (fractional) seconds between two datetime columns."""
+    return (sa.func.julianday(stop) - sa.func.julianday(start)) * 86400.0
+
+
+def clipped_seconds(start: _.Any, stop: _.Any, lower: datetime, upper: datetime) -> sa.ColumnElement:
+    """SQL expression with the seconds of [start, stop) that fall inside [lower, upper)."""
+    return sa.func.max(seconds_between(sa.func.max(start, lower), sa.func.min(stop, upper)), 0)
+
+
+class Window(_.NamedTuple):
+    """A half-open [start, stop) time window."""
+    start: datetime
+    stop: datetime
+
+    @classmethod
+    def day(cls, value: date) -> 'Window':
+        start = datetime.combine(value, time(0))
+        return cls(start, start + timedelta(days=1))
+
+    @classmethod
+    def week(cls, value: date) -> 'Window':
+        start = datetime.combine(value - timedelta(days=value.weekday()), time(0))
+        return cls(start, start + timedelta(days=7))
+
+    @classmethod
+    def month(cls, value: date) -> 'Window':
+        start = datetime.combine(value.replace(day=1), time(0))
+        stop = (start + timedelta(days=32)).replace(day=1)
+        return cls(start, stop)
+
+    @property
+    def full_days(self) -> tuple[date, date]:
+        """[first, last) range of the days entirely inside the window."""
+        first = self.start.date()
+        if self.start.time() != time(0):
+            first += timedelta(days=1)
+        return first, self.stop.date()
+
+
+class Totals(_.NamedTuple):
+    elapsed_seconds: int = 0
+    today_seconds: int = 0
+    start: datetime = datetime.min
+    stop: datetime = datetime.min
+    day: date | None = None  # The day of `today_seconds`, when the totals were loaded
+
+
+def _totals(group_by: _.Any, *where: _.Any,
+            start: datetime = None, stop: datetime = None) -> dict[int, Totals]:
+    """
+    Sum the entries per `group_by` in one grouped query.
+
+    Without bounds the sums come from the daily rollup (`TaskDay`), and `start`/`stop`
+    of the result have day precision. When `start` and/or `stop` are given, only the
+    entries overlapping [start, stop) are considered and their durations are clipped
+    to that window.
+    """
+    if start is None and stop is None:
+        return _rollup_totals(group_by, *where)
+
+    lower, upper = start or datetime.min, stop or datetime.max
+    today_start, today_end = today_range()
+    day = today_start.date()
+    today_start, today_end = max(today_start, lower), min(today_end, upper)
+
+    cmd = (sa.select(group_by,
+                     sa.func.sum(clipped_seconds(TaskEntry.start, TaskEntry.stop, lower, upper)),
+                     sa.func.sum(clipped_seconds(TaskEntry.start, TaskEntry.stop, today_start, today_end)),
+                     sa.func.min(TaskEntry.start),
+                     sa.func.max(TaskEntry.stop))
+           .select_from(TaskEntry)
+           .join(Task, Task.id == TaskEntry.task_id)
+           .where(Task.state != State.DELETED, *where)
+           .group_by(group_by))
+
+    session = get_db().cur_session
+    cmd = cmd.where(*overlapping(start, stop))
+    return {
+        key: Totals(round(elapsed or 0), round(today or 0), first or datetime.min, last or datetime.min, day)
+        for key, elapsed, today, first, last in session.execute(cmd).all()
+    }
+
+
+def overlapping(start: datetime | None, stop: datetime | None, max_days: int = None) -> list[sa.ColumnElement]:
+    """
+    Conditions for the entries overlapping [start, stop).
+
+    The bounds on the `day` bucket let SQLite range-scan `ix_task_entry_day`, entries
+    can only start `days` days before the window, and the longest span comes from
+    `ix_task_entry_days` (or `max_days`, when the caller has no session).
+    """
+    where = []
+    if stop is not None:
+        where += [TaskEntry.day <= stop.date(), TaskEntry.start < stop]
+    if start is not None:
+        if max_days is None:
+            max_days = get_db().cur_session.scalar(max_entry_days())
+        where += [TaskEntry.day >= start.date() - timedelta(days=max_days), TaskEntry.stop > start]
+    return where
+
+
+def max_entry_days() -> sa.Select:
+    """The most midnights crossed by an entry."""
+    return sa.select(sa.func.coalesce(sa.func.max(TaskEntry.days), 0))
+
+
+def _window_seconds(group_by: _.Any, *where: _.Any, start: datetime, stop: datetime) -> dict[_.Any, int]:
+    """
+    Clipped seconds inside [start, stop) per `group_by` (or in a single `None` key).
+
+    The days entirely inside the window are read from the daily rollup, only the
+    partial days at the edges are clipped from the entries.
+    """
+    keys = [] if group_by is None else [group_by]
+    session = get_db().cur_session
+    result = defaultdict(float)
+
+    def collect(cmd: sa.Select) -> None:
+        for *key, seconds in session.execute(cmd).all():
+            result[key[0] if key else None] += seconds or 0
+
+    first, last = Window(start, stop).full_days
+    edges = [(start, stop)]
+    if first < last:
+        collect(sa.select(*keys, sa.func.sum(TaskDay.seconds))
+                .select_from(TaskDay)
+                .join(Task, Task.id == TaskDay.task_id)
+                .where(Task.state != State.DELETED, TaskDay.day >= first, TaskDay.day < last, *where)
+                .group_by(*keys))
+        edges = [(start, datetime.combine(first, time(0))), (datetime.combine(last, time(0)), stop)]
+
+    for lower, upper in edges:
+        if lower < upper:
+            collect(sa.select(*keys, sa.func.sum(clipped_seconds(TaskEntry.start, TaskEntry.stop, lower, upper)))
+                    .select_from(TaskEntry)
+                    .join(Task, Task.id == TaskEntry.task_id)
+                    .where(Task.state != State.DELETED, *overlapping(lower, upper), *where)
+                    .group_by(*keys))
+
+    return {key: round(seconds) for key, seconds in result.items()}
+
+
+def window_seconds(start: datetime, stop: datetime) -> int:
+    """Seconds of all the live tasks inside [start, stop)."""
+    return _window_seconds(None, start=start, stop=stop).get(None, 0)
+
+
+def _rollup_select(group_by: _.Any, *where: _.Any, today: date) -> sa.Select:
+    return (sa.select(group_by.label('key'),
+                      sa.func.sum(TaskDay.seconds).label('elapsed'),
+                      sa.func.sum(sa.case((TaskDay.day == today, TaskDay.seconds), else_=0)).label('today'),
+                      sa.func.min(TaskDay.day).label('first'),
+                      sa.func.max(TaskDay.day).label('last'))
+            .select_from(TaskDay)
+            .join(Task, Task.id == TaskDay.task_id)
+            .where(Task.state != State.DELETED, TaskDay.seconds > 0, *where)
+            .group_by(group_by))
+
+
+def _rollup_row_totals(elapsed: float | None, today: float | None,
+                       first: date | None, last: date | None, day: date) -> Totals:
+    if first is None:
+        return Totals(day=day)
+
+    return Totals(round(elapsed or 0), round(today or 0),
+                  datetime.combine(first, time(0)), datetime.combine(last + timedelta(days=1), time(0)), day)
+
+
+def _rollup_totals(group_by: _.Any, *where: _.Any) -> dict[int, Totals]:
+    session, today = get_db().cur_session, date.today()
+    return {
+        key: _rollup_row_totals(*values, today)
+        for key, *values in session.execute(_rollup_select(group_by, *where, today=today)).all()
+    }
+
+
+# region Name caches
+class LookupCache:
+    """
+    Bounded LRU of record ids by key (e.g. a name), shared by the threads.
+
+    Only found records are kept: a miss always runs the query, so the names created
+    by another process (command line, import) are seen; those only ever add names.
+    A hit is trusted and runs no SQL (`find_id`), the session events drop the keys
+    of the records inserted, changed or deleted, and a rollback clears the cache.
+    """
+
+    def __init__(self, name: str, maxsize: int) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._ids: OrderedDict[_.Hashable, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (f'LookupCache(name: {self.name!r}, '
+                f'size: {len(self._ids)!r}, '
+                f'hits: {self.hits!r}, '
+                f'misses: {self.misses!r})')
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, key: _.Hashable) -> int | None:
+        with self._lock:
+            if (record_id := self._ids.get(key)) is not None:
+                self._ids.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        metrics.count(f'{self.name}.{"hits" if record_id is not None else "misses"}')
+        return record_id
+
+    def put(self, key: _.Hashable, record_id: int) -> None:
+        with self._lock:
+            self._ids[key] = record_id
+            self._ids.move_to_end(key)
+            if len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def discard(self, key: _.Hashable = None, record_id: int = None) -> None:
+        """Drop `key`, and every key of `record_id`."""
+        with self._lock:
+            self._ids.pop(key, None)
+            if record_id is not None:
+                for stale in [cur for cur, cur_id in self._ids.items() if cur_id == record_id]:
+                    del self._ids[stale]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+project_names = LookupCache('models.project_names', maxsize=1024)  # name -> project id
+task_names = LookupCache('models.task_names', maxsize=4096)  # (project id, name) -> task id
+# endregion
+
+
+class TaskSnapshot(_.NamedTuple):
+    """Plain (detached) values of a task and its totals, safe to keep around in the GUI."""
+    id: int
+    project_id: int
+    name: str
+    state: 'State'
+    totals: Totals = Totals()
+
+
+class ProjectSnapshot(_.NamedTuple):
+    """Plain (detached) values of a project with its live tasks."""
+    id: int
+    name: str
+    state: 'State'
+    tasks: list[TaskSnapshot]
+
+    @property
+    def totals(self) -> Totals:
+        with_entries = [t.totals for t in self.tasks if t.totals.start != datetime.min] or [Totals()]
+        return Totals(sum(t.totals.elapsed_seconds for t in self.tasks),
+                      sum(t.totals.today_seconds for t in self.tasks),
+                      min(t.start for t in with_entries),
+                      max(t.stop for t in with_entries),
+                      next((t.totals.day for t in self.tasks), None))
+
+
 class Project(Base):
     __tablename__ = 'project'
 
@@ -43,6 +332,7 @@ class Project(Base):
                 f'updated_at: {self.updated_at!s})')
 
     @classmethod
+    @metrics.timed()
     def find_all(cls) -> _.Generator['Project', None, None]:
         cmd = sa.select(cls).where(cls.state != State.DELETED).order_by(cls.name)
         session = get_db().cur_session
@@ -50,31 +340,92 @@ class Project(Base):
             yield proj[0]
 
     @classmethod
+    @metrics.timed()
     def find_name(cls, name: str) -> 'Project|None':
         cmd = sa.select(cls).where(cls.name == name, cls.state != State.DELETED).limit(1)
         session = get_db().cur_session
         for proj in session.execute(cmd).first() or []:
+            project_names.put(name, proj.id)
             return proj
 
+    @classmethod
+    @metrics.timed()
+    def find_id(cls, name: str) -> int | None:
+        """The id of the live project `name`, from `project_names` when it was found before."""
+        if (project_id := project_names.get(name)) is None:
+            cmd = sa.select(cls.id).where(cls.name == name, cls.state != State.DELETED).limit(1)
+            if (project_id := get_db().cur_session.scalar(cmd)) is not None:
+                project_names.put(name, project_id)
+
+        return project_id
+
+    @classmethod
+    @metrics.timed()
+    def names(cls, prefix: str = '', limit: int = None) -> list[str]:
+        """
+        Names of the live projects starting with `prefix` (ignoring the case of ASCII
+        letters), in order. Only the names are read, no objects are loaded.
+        """
+        name = cls.name.collate('NOCASE')
+        cmd = sa.select(cls.name).where(cls.state != State.DELETED).order_by(name).limit(limit)
+        if prefix:
+            # A range on the NOCASE index, unlike LIKE it needs no escaping.
+            # The index compares folded names, and the bounds are folded too: the next
+            # character after the prefix skips the uppercase letters ('@' + 1 is '[').
+            prefix = nocase(prefix)
+            cmd = cmd.where(name >= prefix)
+            if (last := ord(prefix[-1])) < sys.maxunicode:
+                upper = '[' if prefix[-1] == '@' else chr(last + 1)
+                cmd = cmd.where(name < prefix[:-1] + upper)
+
+        return list(get_db().cur_session.scalars(cmd))
+
+    @classmethod
+    @metrics.timed()
+    def load_snapshot(cls, project_id: int) -> ProjectSnapshot | None:
+        """Load the project, its live tasks and their totals in two statements."""
+        cmd = sa.select(cls.id, cls.name, cls.state).where(cls.id == project_id, cls.state != State.DELETED)
+        session = get_db().cur_session
+        if (row := session.execute(cmd).first()) is None:
+            return None
+
+        return ProjectSnapshot(*row, tasks=Task.snapshots(project_id=project_id))
+
+    @classmethod
+    @metrics.timed()
+    def totals(cls, project_ids: _.Iterable[int] = None,
+               start: datetime = None, stop: datetime = None) -> dict[int, Totals]:
+        """Totals per project id, computed in a single grouped query."""
+        where = [] if project_ids is None else [Task.project_id.in_(list(project_ids))]
+        return _totals(Task.project_id, *where, start=start, stop=stop)
+
+    @classmethod
+    @metrics.timed()
+    def window_seconds(cls, start: datetime, stop: datetime,
+                       project_ids: _.Iterable[int] = None) -> dict[int, int]:
+        """Seconds per project id inside [start, stop), see `Window` for days, weeks and months."""
+        where = [] if project_ids is None else [Task.project_id.in_(list(project_ids))]
+        return _window_seconds(Task.project_id, *where, start=start, stop=stop)
+
+    @property
+    def cur_totals(self) -> Totals:
+        return self.totals([self.id]).get(self.id, Totals())
+
     @property
     def elapsed_seconds(self) -> int:
-        return sum(t.elapsed_seconds for t in self.tasks)
+        return self.cur_totals.elapsed_seconds
 
     @property
     def today_seconds(self) -> int:
-        return sum(t.today_seconds for t in self.tasks)
+        return self.cur_totals.today_seconds
 
     @property
     def start(self) -> datetime:
-        if len(self.tasks) != 0:
-            return min(t.start for t in self.tasks)
-        return datetime.min
+        return self.cur_totals.start
 
     @property
     def stop(self):
-        if len(self.tasks) != 0:
-            return max(t.start for t in self.tasks)
-        return datetime.min
+        return self.cur_totals.stop
 
     @property
     def elapsed_time(self) -> str:
@@ -103,6 +454,7 @@ class Task(Base):
                 f'updated_at: {self.updated_at!s})')
 
     @classmethod
+    @metrics.timed()
     def find(cls, task_id: int) -> 'Task':
         cmd = (sa.select(cls)
                .where(cls.id == task_id, cls.state != State.DELETED)
@@ -112,33 +464,98 @@ class Task(Base):
             return task
 
     @classmethod
+    @metrics.timed()
     def find_name(cls, project_id: int, name: str) -> 'Task':
         cmd = (sa.select(cls)
                .where(cls.name == name, cls.project_id == project_id, cls.state != State.DELETED)
                .limit(1))
         session = get_db().cur_session
         for task in session.execute(cmd).first() or []:
+            task_names.put((project_id, name), task.id)
             return task
 
+    @classmethod
+    @metrics.timed()
+    def find_id(cls, project_id: int, name: str) -> int | None:
+        """The id of the live task `name` of the project, from `task_names` when it was found before."""
+        if (task_id := task_names.get((project_id, name))) is None:
+            cmd = (sa.select(cls.id)
+                   .where(cls.name == name, cls.project_id == project_id, cls.state != State.DELETED)
+                   .limit(1))
+            if (task_id := get_db().cur_session.scalar(cmd)) is not None:
+                task_names.put((project_id, name), task_id)
+
+        return task_id
+
+    @classmethod
+    @metrics.timed()
+    def snapshots(cls, project_id: int = None, task_ids: _.Iterable[int] = None) -> list[TaskSnapshot]:
+        """Live tasks with their totals, ordered by name, in a single statement."""
+        where = []
+        if project_id is not None:
+            where.append(cls.project_id == project_id)
+        if task_ids is not None:
+            where.append(cls.id.in_(list(task_ids)))
+
+        today = date.today()
+        days = _rollup_select(cls.id, *where, today=today).subquery()
+        cmd = (sa.select(cls.id, cls.project_id, cls.name, cls.state,
+                         days.c.elapsed, days.c.today, days.c.first, days.c.last)
+               .outerjoin(days, days.c.key == cls.id)
+               .where(cls.state != State.DELETED, *where)
+               .order_by(cls.name))
+
+        session = get_db().cur_session
+        return [
+            TaskSnapshot(task_id, proj_id, name, state, _rollup_row_totals(*values, today))
+            for task_id, proj_id, name, state, *values in session.execute(cmd).all()
+        ]
+
+    @classmethod
+    @metrics.timed()
+    def totals(cls, project_id: int = None, task_ids: _.Iterable[int] = None,
+               start: datetime = None, stop: datetime = None) -> dict[int, Totals]:
+        """Totals per task id, computed in a single grouped query."""
+        where = []
+        if project_id is not None:
+            where.append(cls.project_id == project_id)
+        if task_ids is not None:
+            where.append(cls.id.in_(list(task_ids)))
+        return _totals(cls.id, *where, start=start, stop=stop)
+
+    @classmethod
+    @metrics.timed()
+    def window_seconds(cls, start: datetime, stop: datetime,
+                       project_id: int = None, task_ids: _.Iterable[int] = None) -> dict[int, int]:
+        """Seconds per task id inside [start, stop), see `Window` for days, weeks and months."""
+        where = []
+        if project_id is not None:
+            where.append(cls.project_id == project_id)
+        if task_ids is not None:
+            where.append(cls.id.in_(list(task_ids)))
+        return _window_seconds(cls.id, *where, start=start, stop=stop)
+
+    @property
+    def cur_totals(self) -> Totals:
+        return self.totals(task_ids=[self.id]).get(self.id, Totals())
+
     @property
     def elapsed_seconds(self) -> int:
-        return sum(e.elapsed_seconds or 0 for e in self.entries)
+        return self.cur_totals.elapsed_seconds
 
     @property
     def today_seconds(self) -> int:
-        return sum(e.today_seconds or 0 for e in self.entries)
+        return self.cur_totals.today_seconds
 
     @property
     def start(self) -> datetime:
-        if len(self.entries) != 0:
-            return min(e.start for e in self.entries)
-        return datetime.min
+        cmd = sa.select(sa.func.min(TaskEntry.start)).where(TaskEntry.task_id == self.id)
+        return get_db().cur_session.scalar(cmd) or datetime.min
 
     @property
     def stop(self):
-        if len(self.entries) != 0:
-            return max(e.start for e in self.entries)
-        return datetime.min
+        cmd = sa.select(sa.func.max(TaskEntry.stop)).where(TaskEntry.task_id == self.id)
+        return get_db().cur_session.scalar(cmd) or datetime.min
 
     @property
     def elapsed_time(self) -> str:
@@ -149,11 +566,18 @@ class Task(Base):
 class TaskEntry(Base):
     __tablename__ = 'task_entry'
 
-    start: Mapped[datetime] = column(sa.DateTime, default=datetime.now)
-    stop: Mapped[datetime] = column(sa.DateTime, default=datetime.now)
+    # active_history keeps the old values around, the daily rollup needs them to apply deltas.
+    start: Mapped[datetime] = column(sa.DateTime, default=datetime.now, active_history=True)
+    stop: Mapped[datetime] = column(sa.DateTime, default=datetime.now, active_history=True)
     manual: Mapped[bool] = column(sa.Boolean, default=False)
+    # Timer still running: `stop` is its last checkpoint (see `timers.TimerRegistry.checkpoint`).
+    running: Mapped[bool] = column(sa.Boolean, default=False, server_default=sa.false(), nullable=False)
 
-    task_id: Mapped[int] = column(sa.ForeignKey('task.id'), nullable=False)
+    # Day buckets: the day of `start` and how many midnights the entry crosses (see `day_buckets`).
+    day: Mapped[date] = column(sa.Date, nullable=True)
+    days: Mapped[int] = column(sa.Integer, default=0, nullable=True)
+
+    task_id: Mapped[int] = column(sa.ForeignKey('task.id'), nullable=False, active_history=True)
     task: Mapped['Task'] = relationship(back_populates='entries')
 
     def __repr__(self) -> str:
@@ -167,12 +591,46 @@ class TaskEntry(Base):
                 f'updated_at: {self.updated_at!s})')
 
     @classmethod
+    @metrics.timed()
     def find(cls, entry_id: int) -> 'TaskEntry|None':
         cmd = sa.select(cls).where(cls.id == entry_id).limit(1)
         session = get_db().cur_session
         for entry in session.execute(cmd).first() or []:
             return entry
 
+    @classmethod
+    @metrics.timed()
+    def page(cls, task_id: int, before: tuple[datetime, int] = None, limit: int = 50) -> list['TaskEntry']:
+        """
+        One page of the entries of a task, newest first.
+
+        `before` is the keyset cursor, the (start, id) of the last entry of the previous
+        page; the lookup walks `ix_task_entry_task_page` backwards from there.
+        """
+        cmd = sa.select(cls).where(cls.task_id == task_id)
+        if before is not None:
+            cmd = cmd.where(sa.tuple_(cls.start, cls.id) < sa.tuple_(*before))
+        cmd = cmd.order_by(cls.start.desc(), cls.id.desc()).limit(limit)
+
+        session = get_db().cur_session
+        return list(session.scalars(cmd))
+
+    @classmethod
+    @metrics.timed()
+    def find_running(cls, entry_ids: _.Iterable[int] = None, task_ids: _.Iterable[int] = None) -> list['TaskEntry']:
+        cmd = sa.select(cls).where(cls.running.is_(True)).order_by(cls.start)
+        if entry_ids is not None:
+            cmd = cmd.where(cls.id.in_(list(entry_ids)))
+        if task_ids is not None:
+            cmd = cmd.where(cls.task_id.in_(list(task_ids)))
+
+        session = get_db().cur_session
+        return list(session.scalars(cmd))
+
+    @property
+    def cursor(self) -> tuple[datetime, int]:
+        return self.start, self.id
+
     @property
     def elapsed_seconds(self) -> int:
         return int((self.stop - self.start).total_seconds())
@@ -184,21 +642,216 @@ class TaskEntry(Base):
 
     @property
     def today_seconds(self) -> int:
-        today_start = datetime.combine(datetime.today(), time(0))
-        today_end = datetime.combine(datetime.today(), time(23, 59, 59, 999999))
+        return self.window_seconds(*today_range())
 
-        start = stop = today_start
-
-        if today_start <= self.start <= today_end:
-            start = self.start
-
-        if today_start <= self.stop <= today_end:
-            stop = self.stop
-
-        return int((stop - start).total_seconds())
+    def window_seconds(self, start: datetime, stop: datetime) -> int:
+        """Seconds of this entry inside [start, stop)."""
+        start, stop = max(self.start, start), min(self.stop, stop)
+        return max(int((stop - start).total_seconds()), 0)
 
     def set_stop(self) -> None:
         self.stop = datetime.now()
 
     def set_start(self) -> None:
         self.start = datetime.now()
+
+
+class TaskDay(Base):
+    """Daily rollup: seconds spent on a task in a day, kept up to date by the `TaskEntry` events."""
+    __tablename__ = 'task_day'
+
+    task_id: Mapped[int] = column(sa.ForeignKey('task.id'), nullable=False)
+    day: Mapped[date] = column(sa.Date, nullable=False)
+    seconds: Mapped[float] = column(sa.Float, default=0.0, nullable=False)
+
+    __table_args__ = (sa.UniqueConstraint(task_id, day),)
+
+    def __repr__(self) -> str:
+        return (f'TaskDay('
+                f'id: {self.id!r}, '
+                f'task_id: {self.task_id!r}, '
+                f'day: {self.day!s}, '
+                f'seconds: {self.seconds!r})')
+
+
+# region Indexes
+# Partial indexes only hold the live rows: every finder filters on `state != DELETED`.
+sa.Index('ix_project_live_name', Project.name, sqlite_where=Project.state != State.DELETED)
+# Prefix search of the project picker, see `Project.names`.
+sa.Index('ix_project_live_name_nocase', Project.name.collate('NOCASE'), sqlite_where=Project.state != State.DELETED)
+sa.Index('ix_task_live_project_name', Task.project_id, Task.name, sqlite_where=Task.state != State.DELETED)
+sa.Index('ix_task_entry_task_start', TaskEntry.task_id, TaskEntry.start, TaskEntry.stop)
+sa.Index('ix_task_day_day', TaskDay.day, TaskDay.task_id)
+sa.Index('ix_task_entry_day', TaskEntry.day)
+sa.Index('ix_task_entry_days', TaskEntry.days)
+# The rowid (`id`) is implicitly the last column, so this index is ordered by (task_id, start, id).
+sa.Index('ix_task_entry_task_page', TaskEntry.task_id, TaskEntry.start)
+sa.Index('ix_task_entry_running', TaskEntry.id, sqlite_where=TaskEntry.running.is_(True))
+# endregion
+
+
+# region Data version
+def data_version(connection: sa.Connection = None) -> int:
+    """
+    Number bumped after every commit changing the totals, names or states; used to expire
+    caches. With a `connection`, the commits of other processes (e.g. `cli.py`) count too:
+    SQLite changes its `PRAGMA data_version` when another connection committed.
+    """
+    if connection is not None:
+        seen = connection.exec_driver_sql('PRAGMA data_version').scalar()
+        if connection.info.get('data_version') != seen:
+            connection.info['data_version'] = seen
+            touch_data()
+
+    return _data_version
+
+
+def touch_data() -> None:
+    """Bump the version, once the changes are committed (a cache built before would miss them)."""
+    global _data_version
+    _data_version += 1
+
+
+@sa.event.listens_for(Session, 'after_flush')
+def _session_flushed(session: Session, flush_context: _.Any) -> None:
+    if any(isinstance(obj, (Project, Task, TaskEntry)) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['data_changed'] = True
+
+
+@sa.event.listens_for(Session, 'after_commit')
+def _session_committed(session: Session) -> None:
+    if session.info.pop('data_changed', False):
+        touch_data()
+
+
+@sa.event.listens_for(Session, 'after_rollback')
+def _session_rolled_back(session: Session) -> None:
+    session.info.pop('data_changed', None)
+# endregion
+
+
+# region Name cache events
+@sa.event.listens_for(Session, 'after_flush')
+def _names_flushed(session: Session, flush_context: _.Any) -> None:
+    """Drop the names of the inserted, changed (renamed, deleted state) and deleted rows."""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        # The loaded values only, a deleted row cannot be loaded anymore.
+        values = sa.inspect(obj).dict
+        if isinstance(obj, Project):
+            project_names.discard(values.get('name'), values.get('id'))
+        elif isinstance(obj, Task):
+            task_names.discard((values.get('project_id'), values.get('name')), values.get('id'))
+
+
+@sa.event.listens_for(Session, 'after_rollback')
+def _names_rolled_back(session: Session) -> None:
+    """The ids found since the last commit may be gone."""
+    project_names.clear()
+    task_names.clear()
+# endregion
+
+
+# region Day buckets
+def day_buckets(start: datetime, stop: datetime) -> dict[str, _.Any]:
+    """Values of the `day`/`days` columns for an entry."""
+    return {'day': start.date(), 'days': max((stop.date() - start.date()).days, 0)}
+
+
+@sa.event.listens_for(TaskEntry, 'before_insert')
+@sa.event.listens_for(TaskEntry, 'before_update')
+def _entry_set_buckets(mapper, connection: sa.Connection, target: TaskEntry) -> None:
+    if target.start is not None and target.stop is not None:
+        for name, value in day_buckets(target.start, target.stop).items():
+            setattr(target, name, value)
+# endregion
+
+
+# region Daily rollup
+def split_by_day(start: datetime, stop: datetime) -> _.Generator[tuple[date, float], None, None]:
+    """Split [start, stop) in (day, seconds) pieces, at midnight."""
+    while start < stop:
+        midnight = datetime.combine(start.date() + timedelta(days=1), time(0))
+        end = min(stop, midnight)
+        yield start.date(), (end - start).total_seconds()
+        start = end
+
+
+def add_day_deltas(deltas: dict[DayKey, float], task_id: int,
+                   start: datetime | None, stop: datetime | None, sign: int = 1) -> None:
+    if task_id is None or start is None or stop is None:
+        return
+
+    for day, seconds in split_by_day(start, stop):
+        deltas[(task_id, day)] += sign * seconds
+
+
+def apply_day_deltas(connection: sa.Connection, deltas: dict[DayKey, float]) -> None:
+    """Upsert the deltas into `task_day`."""
+    rows = [dict(task_id=task_id, day=day, seconds=seconds)
+            for (task_id, day), seconds in deltas.items() if seconds != 0]
+    if not rows:
+        return
+
+    table = TaskDay.__table__
+    cmd = sqlite_insert(table)
+    cmd = cmd.on_conflict_do_update(
+        index_elements=[table.c.task_id, table.c.day],
+        set_={'seconds': table.c.seconds + cmd.excluded.seconds, 'updated_at': datetime.now()}
+    )
+    connection.execute(cmd, rows)
+
+
+def _entry_values(target: 'TaskEntry', attr: str) -> tuple[_.Any, _.Any]:
+    """Return the (old, new) values of an attribute of a flushed entry."""
+    history = sa.inspect(target).attrs[attr].history
+    new = getattr(target, attr)
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+
+@sa.event.listens_for(TaskEntry, 'after_insert')
+def _entry_inserted(mapper, connection: sa.Connection, target: TaskEntry) -> None:
+    deltas = defaultdict(float)
+    add_day_deltas(deltas, target.task_id, target.start, target.stop)
+    apply_day_deltas(connection, deltas)
+
+
+@sa.event.listens_for(TaskEntry, 'after_update')
+def _entry_updated(mapper, connection: sa.Connection, target: TaskEntry) -> None:
+    old_task_id, new_task_id = _entry_values(target, 'task_id')
+    old_start, new_start = _entry_values(target, 'start')
+    old_stop, new_stop = _entry_values(target, 'stop')
+
+    deltas = defaultdict(float)
+    add_day_deltas(deltas, old_task_id, old_start, old_stop, sign=-1)
+    add_day_deltas(deltas, new_task_id, new_start, new_stop)
+    apply_day_deltas(connection, deltas)
+
+
+@sa.event.listens_for(TaskEntry, 'after_delete')
+def _entry_deleted(mapper, connection: sa.Connection, target: TaskEntry) -> None:
+    deltas = defaultdict(float)
+    add_day_deltas(deltas, target.task_id, target.start, target.stop, sign=-1)
+    apply_day_deltas(connection, deltas)
+
+
+def rebuild_task_days(batch_size: int = 10_000) -> int:
+    """Recompute `task_day` from all the entries, returns the number of rollup rows."""
+    deltas = defaultdict(float)
+
+    with get_db().session() as session:
+        connection = session.connection()
+        connection.execute(sa.delete(TaskDay))
+        session.info['data_changed'] = True
+
+        cmd = (sa.select(TaskEntry.task_id, TaskEntry.start, TaskEntry.stop)
+               .execution_options(yield_per=batch_size))
+        for task_id, start, stop in connection.execute(cmd):
+            add_day_deltas(deltas, task_id, start, stop)
+
+        apply_day_deltas(connection, deltas)
+
+    return len(deltas)
+
+
+# endregion
@@ -0,0 +1,182 @@
+"""
+Pivot reports: time per project and per date bucket (day, week or month).
+
+The pivot is grouped in SQL from the daily rollup (`task_day`) and the rows are
+streamed from a dedicated connection, one pivot row at a time. Completed reports
+are cached until `models.data_version()` changes, including the commits of other
+processes (e.g. `cli.py`).
+"""
+import typing as _
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from enum import StrEnum
+import sqlalchemy as sa
+import models as m
+from db import get_db
+
+CACHE_SIZE = 16
+FETCH_SIZE = 1_000
+
+
+class Granularity(StrEnum):
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+
+
+class Kind(StrEnum):
+    PROJECT_BY_DATE = 'Project x Date'
+    DATE_BY_PROJECT = 'Date x Project'
+
+
+class PivotRow(_.NamedTuple):
+    label: str
+    values: list[int]
+
+    @property
+    def total(self) -> int:
+        return sum(self.values)
+
+
+class Report(_.NamedTuple):
+    kind: Kind
+    columns: list[str]
+    rows: _.Iterable[PivotRow]
+
+
+ReportKey = tuple[Kind, date, date, Granularity]
+
+_cache: 'OrderedDict[ReportKey, tuple[int, Report]]' = OrderedDict()
+_cache_lock = threading.Lock()  # The reports are built by the GUI worker threads
+
+
+# region Buckets
+def bucket_of(value: date, granularity: Granularity) -> date:
+    if granularity == Granularity.WEEK:
+        return value - timedelta(days=value.weekday())
+    if granularity == Granularity.MONTH:
+        return value.replace(day=1)
+    return value
+
+
+def buckets(start: date, stop: date, granularity: Granularity) -> list[date]:
+    """All the buckets touched by the days in [start, stop)."""
+    result, value = [], bucket_of(start, granularity)
+    while value < stop:
+        result.append(value)
+        value = (value + timedelta(days=32)).replace(day=1) if granularity == Granularity.MONTH \
+            else value + timedelta(days=7 if granularity == Granularity.WEEK else 1)
+    return result
+
+
+def bucket_label(value: date, granularity: Granularity) -> str:
+    return value.strftime('%m-%Y' if granularity == Granularity.MONTH else '%d-%m-%Y')
+
+
+def _bucket_sql(granularity: Granularity) -> sa.ColumnElement:
+    if granularity == Granularity.WEEK:
+        return sa.func.date(m.TaskDay.day, '-6 days', 'weekday 1')
+    if granularity == Granularity.MONTH:
+        return sa.func.strftime('%Y-%m-01', m.TaskDay.day)
+    return sa.func.date(m.TaskDay.day)
+# endregion
+
+
+# region Queries
+def _pivot_select(start: date, stop: date, granularity: Granularity) -> sa.Select:
+    bucket = _bucket_sql(granularity).label('bucket')
+    return (sa.select(m.Project.id, m.Project.name, bucket, sa.func.sum(m.TaskDay.seconds))
+            .select_from(m.TaskDay)
+            .join(m.Task, m.Task.id == m.TaskDay.task_id)
+            .join(m.Project, m.Project.id == m.Task.project_id)
+            .where(m.TaskDay.day >= start, m.TaskDay.day < stop, m.TaskDay.seconds > 0,
+                   m.Task.state != m.State.DELETED, m.Project.state != m.State.DELETED)
+            .group_by(m.Project.id, bucket))
+
+
+def _stream(cmd: sa.Select) -> _.Generator[sa.Row, None, None]:
+    with get_db().engine.connect() as connection:
+        yield from connection.execution_options(yield_per=FETCH_SIZE).execute(cmd)
+
+
+def _project_by_date(start: date, stop: date, granularity: Granularity) -> Report:
+    columns = buckets(start, stop, granularity)
+    index = {value: idx for idx, value in enumerate(columns)}
+
+    def rows() -> _.Generator[PivotRow, None, None]:
+        cmd = _pivot_select(start, stop, granularity).order_by(m.Project.name, m.Project.id, 'bucket')
+        cur_id, cur_row = None, None
+        for project_id, name, bucket, seconds in _stream(cmd):
+            if project_id != cur_id:
+                if cur_row is not None:
+                    yield cur_row
+                cur_id, cur_row = project_id, PivotRow(name, [0] * len(columns))
+            cur_row.values[index[date.fromisoformat(bucket)]] = round(seconds)
+
+        if cur_row is not None:
+            yield cur_row
+
+    return Report(Kind.PROJECT_BY_DATE, [bucket_label(c, granularity) for c in columns], rows())
+
+
+def _date_by_project(start: date, stop: date, granularity: Granularity) -> Report:
+    pivot = _pivot_select(start, stop, granularity).subquery()
+    projects = (sa.select(pivot.c.id, pivot.c.name)
+                .distinct()
+                .order_by(pivot.c.name, pivot.c.id))
+    with get_db().engine.connect() as connection:
+        projects = connection.execute(projects).all()
+    index = {project_id: idx for idx, (project_id, _name) in enumerate(projects)}
+
+    def rows() -> _.Generator[PivotRow, None, None]:
+        cmd = _pivot_select(start, stop, granularity).order_by('bucket')
+        cur_bucket, cur_row = None, None
+        for project_id, _name, bucket, seconds in _stream(cmd):
+            if bucket != cur_bucket:
+                if cur_row is not None:
+                    yield cur_row
+                label = bucket_label(date.fromisoformat(bucket), granularity)
+                cur_bucket, cur_row = bucket, PivotRow(label, [0] * len(projects))
+            cur_row.values[index[project_id]] = round(seconds)
+
+        if cur_row is not None:
+            yield cur_row
+
+    return Report(Kind.DATE_BY_PROJECT, [name for _id, name in projects], rows())
+# endregion
+
+
+# region Cache
+def _caching(key: ReportKey, version: int, report: Report) -> Report:
+    """Stream the rows, the report is cached only once it was read to the end."""
+    def rows() -> _.Generator[PivotRow, None, None]:
+        done = []
+        for row in report.rows:
+            done.append(row)
+            yield row
+
+        with _cache_lock:
+            _cache[key] = version, report._replace(rows=done)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return report._replace(rows=rows())
+
+
+def build(kind: Kind, start: date, stop: date, granularity: Granularity = Granularity.DAY) -> Report:
+    """Build the report for the days in [start, stop)."""
+    key = (kind, start, stop, granularity)
+    with get_db().engine.connect() as connection:
+        version = m.data_version(connection)
+
+    with _cache_lock:
+        if (cached := _cache.get(key)) is not None:
+            if cached[0] == version:
+                _cache.move_to_end(key)
+                return cached[1]
+            del _cache[key]
+
+    builder = _project_by_date if kind == Kind.PROJECT_BY_DATE else _date_by_project
+    return _caching(key, version, builder(start, stop, granularity))
+# endregion
@@ -0,0 +1,189 @@
+"""
+Opt-in count of the SQL statements, to catch lazy loads firing in loops (N+1).
+
+    database.enable_profiler(repeat_threshold=10)
+
+    with database.profiled('load grid'):    # or any `database.session()` and worker job
+        ...
+
+The statements run by a thread are added to its current action: the block of
+`Database.profiled`, a job of `gui.worker.Worker`, or else the outermost
+`Database.session()` (named after the function that opened it). Actions nest, a
+statement counts for the outermost one. The statements are grouped by their
+normalized SQL (literals and parameter lists replaced by `?`), and when one runs
+more than `repeat_threshold` times in an action a `RepeatedQueryWarning` is issued.
+
+`assert_max_queries` is meant for tests and checks:
+
+    with assert_max_queries(2):
+        MainForm.load_tasks(project_id)
+"""
+import typing as _
+import re
+import threading
+import time
+import warnings
+from collections import deque
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+if _.TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+REPEAT_THRESHOLD = 10
+KEEP_ACTIONS = 100
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+class RepeatedQueryWarning(UserWarning):
+    pass
+
+
+def normalize(statement: str) -> str:
+    """The SQL without its literals, so the same query with other values is grouped."""
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _PARAMS.sub('(?...)', statement)
+    return _SPACES.sub(' ', statement).strip()
+
+
+class StatementStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+    def __repr__(self) -> str:
+        return f'StatementStats(count: {self.count!r}, seconds: {self.seconds:.6f})'
+
+
+class Action:
+    """The statements of a unit of work or of a GUI action."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: dict[str, StatementStats] = {}
+
+    def __repr__(self) -> str:
+        return (f'Action(name: {self.name!r}, '
+                f'count: {self.count!r}, '
+                f'seconds: {self.seconds:.6f})')
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+
+        if (stats := self.statements.get(statement)) is None:
+            self.statements[statement] = stats = StatementStats()
+        stats.count += 1
+        stats.seconds += seconds
+
+    def repeated(self, threshold: int) -> list[tuple[str, StatementStats]]:
+        return [(statement, stats) for statement, stats in self.statements.items() if stats.count > threshold]
+
+    def summary(self, limit: int = None) -> str:
+        """The statements by total time, the `limit` slowest ones."""
+        lines = [f'{self.name}: {self.count} statements, {self.seconds * 1000:.1f} ms']
+        statements = sorted(self.statements.items(), key=lambda item: item[1].seconds, reverse=True)
+        for statement, stats in statements[:limit]:
+            lines.append(f'  {stats.count:5} x {stats.seconds * 1000:8.1f} ms  {statement}')
+        return '\n'.join(lines)
+
+
+class SqlProfiler:
+    def __init__(self, engine: 'Engine', repeat_threshold: int = REPEAT_THRESHOLD,
+                 keep_actions: int = KEEP_ACTIONS) -> None:
+        self.engine = engine
+        self.repeat_threshold = repeat_threshold
+        self.actions: deque[Action] = deque(maxlen=keep_actions)  # The last finished ones
+        self.total = Action('total')
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._installed = False
+
+    # region Events
+    def install(self) -> None:
+        if not self._installed:
+            event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+            event.listen(self.engine, 'after_cursor_execute', self._after_execute)
+            self._installed = True
+
+    def remove(self) -> None:
+        if self._installed:
+            event.remove(self.engine, 'before_cursor_execute', self._before_execute)
+            event.remove(self.engine, 'after_cursor_execute', self._after_execute)
+            self._installed = False
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self._local.started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        seconds = time.perf_counter() - getattr(self._local, 'started', time.perf_counter())
+        statement = normalize(statement)
+
+        if (action := self.current) is not None:
+            action.add(statement, seconds)
+        with self._lock:
+            self.total.add(statement, seconds)
+    # endregion
+
+    # region Actions
+    @property
+    def current(self) -> Action | None:
+        return getattr(self._local, 'action', None)
+
+    @contextmanager
+    def action(self, name: str) -> _.Generator[Action, None, None]:
+        """Count the statements of the block, unless an action is already running on this thread."""
+        if (action := self.current) is not None:
+            yield action
+            return
+
+        self._local.action = action = Action(name)
+        try:
+            yield action
+        finally:
+            self._local.action = None
+            self.finish(action)
+
+    def finish(self, action: Action) -> None:
+        with self._lock:
+            self.actions.append(action)
+
+        for statement, stats in action.repeated(self.repeat_threshold):
+            warnings.warn(f'{action.name}: {stats.count} times {statement}', RepeatedQueryWarning, stacklevel=4)
+    # endregion
+
+
+class QueryCountError(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine: 'Engine' = None) -> _.Generator[Action, None, None]:
+    """
+    Fail with `QueryCountError` when the block (in this thread) runs more than `limit`
+    statements, on `engine` or the one of `db.get_db()`.
+    """
+    if engine is None:
+        from db import get_db
+        engine = get_db().engine
+
+    profiler = SqlProfiler(engine, repeat_threshold=limit)
+    profiler.install()
+    action = Action('assert_max_queries')
+    profiler._local.action = action
+    try:
+        yield action
+    finally:
+        profiler.remove()
+
+    if action.count > limit:
+        raise QueryCountError(f'{action.count} statements, expected at most {limit}\n{action.summary()}')
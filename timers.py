@@ -0,0 +1,192 @@
+"""
+In-memory running timers.
+
+A running timer keeps the totals of its task as they were when it started (the
+baseline) and adds the time since `start` on every tick, so a tick never touches
+the database, whatever the size of the task history.
+
+The entry of a running timer is saved when it starts, flagged as `running`, and
+its `stop` is checkpointed every `checkpoint_interval` seconds, all the timers in
+one transaction. A timer lives in the database, not in a process: it can be
+started and stopped from the command line (see `cli.py`). Closing the GUI stops
+its timers (`TimerRegistry.close_all`). When it starts, the GUI asks about the
+entries still running, left by the command line or by a crash: it either picks
+them up (`TimerRegistry.resume`), counting the time since their start, or ends
+them at their last checkpoint (`TimerRegistry.end_left`).
+"""
+import typing as _
+from datetime import datetime, time, timedelta
+import metrics
+import models as m
+from db import get_db
+
+CHECKPOINT_INTERVAL = 60  # Seconds
+
+
+class RunningTimer:
+    def __init__(self, task_id: int, baseline: m.Totals, start: datetime = None) -> None:
+        self.task_id = task_id
+        self.baseline = baseline
+        self.start = start or datetime.now()
+        self.baseline_day = baseline.day or self.start.date()  # The baseline "today" counts on that day only
+        self.entry_id: int | None = None
+        self.saved: datetime | None = None  # Last checkpoint of an entry left running (`left_timers`)
+
+    def __repr__(self) -> str:
+        return (f'RunningTimer(task_id: {self.task_id!r}, '
+                f'start: {self.start!s}, '
+                f'baseline: {self.baseline!r})')
+
+    def elapsed_seconds(self, now: datetime = None) -> int:
+        now = now or datetime.now()
+        return max(int((now - self.start).total_seconds()), 0)
+
+    def today_seconds(self, now: datetime = None) -> int:
+        """The baseline only counts while it is still the same day, after midnight it starts from zero."""
+        now = now or datetime.now()
+        midnight = datetime.combine(now.date(), time(0))
+        baseline = self.baseline.today_seconds if now.date() == self.baseline_day else 0
+        return baseline + max(int((now - max(self.start, midnight)).total_seconds()), 0)
+
+    def totals(self, now: datetime = None) -> tuple[int, int]:
+        """Return the (total, today) seconds of the task, including the running time."""
+        now = now or datetime.now()
+        return self.baseline.elapsed_seconds + self.elapsed_seconds(now), self.today_seconds(now)
+
+    def to_entry(self, stop: datetime = None) -> m.TaskEntry:
+        return m.TaskEntry(task_id=self.task_id, manual=False, start=self.start, stop=stop or datetime.now())
+
+    def open_entry(self) -> int:
+        """Save the entry as running, with no time yet."""
+        with get_db().session() as session:
+            entry = self.to_entry(stop=self.start)
+            entry.running = True
+            session.add(entry)
+            session.flush()
+            self.entry_id = entry.id
+
+        return self.entry_id
+
+    def close_entry(self, stop: datetime = None) -> None:
+        with get_db().session() as session:
+            entry = m.TaskEntry.find(self.entry_id) if self.entry_id is not None else None
+            if entry is None:
+                entry = self.to_entry()
+            elif not entry.running:
+                return  # Stopped somewhere else, e.g. from the command line
+            entry.stop = max(stop or datetime.now(), entry.start)
+            entry.running = False
+            session.add(entry)
+
+
+class TimerRegistry:
+    """The running timers, by task id. Lives outside the widgets, so rows can be reused."""
+
+    def __init__(self, checkpoint_interval: int = CHECKPOINT_INTERVAL) -> None:
+        self.checkpoint_interval = timedelta(seconds=checkpoint_interval)
+        self._timers: dict[int, RunningTimer] = {}
+        self._checkpointed = datetime.now()
+        self.saving: set[int] = set()  # Task ids whose entry is being saved by a GUI worker
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._timers
+
+    def __iter__(self) -> _.Iterator[RunningTimer]:
+        return iter(list(self._timers.values()))
+
+    def get(self, task_id: int) -> RunningTimer | None:
+        return self._timers.get(task_id)
+
+    def start(self, task_id: int, baseline: m.Totals, start: datetime = None) -> RunningTimer:
+        self._timers[task_id] = timer = RunningTimer(task_id, baseline, start)
+        return timer
+
+    def stop(self, task_id: int) -> RunningTimer | None:
+        return self._timers.pop(task_id, None)
+
+    def left_timers(self) -> list[RunningTimer]:
+        """
+        Timers of the entries still running in the database, and not here. Only reads,
+        so it can run on a worker thread; `resume` or `end_left` them afterwards.
+        """
+        left = []
+        with get_db().session():
+            entries = [entry for entry in m.TaskEntry.find_running() if entry.task_id not in self]
+            tasks = {task.id: task for task in m.Task.snapshots(task_ids={e.task_id for e in entries})}
+
+            for entry in entries:
+                if (task := tasks.get(entry.task_id)) is None:
+                    continue
+
+                # The task totals already count the entry up to its last checkpoint.
+                baseline = task.totals._replace(
+                    elapsed_seconds=task.totals.elapsed_seconds - entry.elapsed_seconds,
+                    today_seconds=task.totals.today_seconds - entry.today_seconds,
+                )
+                timer = RunningTimer(entry.task_id, baseline, entry.start)
+                timer.entry_id = entry.id
+                timer.saved = entry.stop
+                left.append(timer)
+
+        return left
+
+    def resume(self, left: list[RunningTimer] = None) -> list[RunningTimer]:
+        """Start the timers of the entries still running in the database (`left_timers`)."""
+        resumed = []
+        for timer in self.left_timers() if left is None else left:
+            if timer.task_id not in self:
+                self._timers[timer.task_id] = timer
+                resumed.append(timer)
+
+        return resumed
+
+    @staticmethod
+    def end_left(left: list[RunningTimer]) -> int:
+        """End the entries of `left_timers` at their last checkpoint. Returns how many."""
+        with get_db().session() as session:
+            entries = m.TaskEntry.find_running([timer.entry_id for timer in left])
+            for entry in entries:
+                entry.running = False
+                session.add(entry)
+
+        return len(entries)
+
+    def due(self, now: datetime = None) -> bool:
+        return bool(self._timers) and (now or datetime.now()) - self._checkpointed >= self.checkpoint_interval
+
+    def checkpoint(self, now: datetime = None) -> int:
+        """Save `now` as the stop of all the running entries, in one transaction. Returns how many."""
+        return self.save_entries(*self.begin_checkpoint(now))
+
+    def begin_checkpoint(self, now: datetime = None) -> tuple[list[int], datetime]:
+        """The arguments of `save_entries` for a checkpoint, which can then run on a worker thread."""
+        self._checkpointed = now = now or datetime.now()
+        return self.entry_ids(), now
+
+    def close_all(self, now: datetime = None) -> int:
+        """Stop all the timers, their entries end `now` (the final checkpoint). Returns how many."""
+        closed = self.save_entries(self.entry_ids(), now or datetime.now(), running=False)
+        self._timers.clear()
+        return closed
+
+    def entry_ids(self) -> list[int]:
+        return [timer.entry_id for timer in self if timer.entry_id is not None]
+
+    @staticmethod
+    @metrics.timed()
+    def save_entries(entry_ids: list[int], stop: datetime, running: bool = True) -> int:
+        if not entry_ids:
+            return 0
+
+        with get_db().session() as session:
+            entries = m.TaskEntry.find_running(entry_ids)
+            for entry in entries:
+                entry.stop = max(stop, entry.start)
+                entry.running = running
+                session.add(entry)
+
+        return len(entries)
+
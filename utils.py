@@ -1,7 +1,4 @@
-import typing as _
 import re
-import time as _time
-from functools import wraps
 from datetime import datetime, date, time
 
 
@@ -17,50 +14,65 @@ class time_pattern:
     HOUR_MINUTE_SECOND = re.compile(r'^(\d+)[\s\.\:\-](\d+)[\s\.\:\-](\d+)$')
 
 
-def dateformat(value: str) -> str:
+def match_date(value: str) -> date | None:
+    """The date in one of the `dateformat` formats, None when it does not match."""
     if match := date_pattern.ONLY_DAY.match(value):
         day = match.group(1)
         today = datetime.today()
-        value = date(today.year, today.month, int(day))
-        return value.strftime('%d-%m-%Y')
+        return date(today.year, today.month, int(day))
 
     elif match := date_pattern.DAY_MONTH.match(value):
         day, month = match.groups()
         today = datetime.today()
-        value = date(today.year, int(month), int(day))
-        return value.strftime('%d-%m-%Y')
+        return date(today.year, int(month), int(day))
 
     elif match := date_pattern.DAY_MONTH_YEAR.match(value):
         day, month, year = match.groups()
-        value = date(int(year), int(month), int(day))
-        return value.strftime('%d-%m-%Y')
-    else:
-        print('UNMATCHED:', value)
+        return date(int(year), int(month), int(day))
 
 
-def timeformat(value: str) -> str:
+def match_time(value: str) -> time | None:
+    """The time in one of the `timeformat` formats, None when it does not match."""
     if match := time_pattern.ONLY_HOUR.match(value):
         hour = match.group(1)
-        value = time(int(hour), 0, 0)
-        return value.strftime('%H:%M:%S')
+        return time(int(hour), 0, 0)
     elif match := time_pattern.HOUR_MINUTE.match(value):
         hour, minute = match.groups()
-        value = time(int(hour), int(minute), 0)
-        return value.strftime('%H:%M:%S')
+        return time(int(hour), int(minute), 0)
     elif match := time_pattern.HOUR_MINUTE_SECOND.match(value):
         hour, minute, second = match.groups()
-        value = time(int(hour), int(minute), int(second))
-        return value.strftime('%H:%M:%S')
+        return time(int(hour), int(minute), int(second))
+
+
+def dateformat(value: str) -> str:
+    if (value_date := match_date(value)) is not None:
+        return value_date.strftime('%d-%m-%Y')
+    else:
+        print('UNMATCHED:', value)
+
+
+def timeformat(value: str) -> str:
+    if (value_time := match_time(value)) is not None:
+        return value_time.strftime('%H:%M:%S')
+
+
+def parse_date(value: str) -> date:
+    """Parse a date in one of the `dateformat` formats, quietly."""
+    if (result := match_date(value.strip())) is None:
+        raise ValueError(f'invalid date {value!r}')
+    return result
+
 
+def parse_time(value: str) -> time:
+    """Parse a time in one of the `timeformat` formats."""
+    if (result := match_time(value.strip())) is None:
+        raise ValueError(f'invalid time {value!r}')
+    return result
 
-def timeit(func: _.Callable) -> _.Callable:
-    @wraps(func)
-    def _timeit(*args, **kwargs) -> _.Any:
-        start = _time.time_ns()
-        result = func(*args, **kwargs)
-        stop = _time.time_ns()
 
-        print(f'{func.__name__}: {(stop-start)/1_000_000}')
-        return result
+def format_seconds(seconds: int | float) -> str:
+    """Format a duration as H:MM:SS, hours are not wrapped at 24."""
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02}:{seconds:02}'
 
-    return _timeit